@@ -4,10 +4,16 @@ All dependencies included in one file to avoid import issues
 """
 
 import os
+import time
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from functools import wraps
-from flask import Flask, request, jsonify, redirect, url_for, session, render_template
+from functools import lru_cache, wraps
+from flask import Flask, Response, request, jsonify, redirect, url_for, session, render_template, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from flask_sqlalchemy import SQLAlchemy
@@ -17,24 +23,51 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from cryptography.fernet import Fernet
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from sqlalchemy import and_, func, lambda_stmt, select
+from sqlalchemy.orm import aliased
 import pytz
 try:
-    from .db_utils import ensure_capacities_columns
+    from .db_utils import ensure_capacities_columns, ensure_indexes
+    from .crypto_utils import TokenCipher
+    from .env_utils import ensure_env
 except ImportError:  # pragma: no cover - fallback for direct execution
-    from db_utils import ensure_capacities_columns
+    from db_utils import ensure_capacities_columns, ensure_indexes
+    from crypto_utils import TokenCipher
+    from env_utils import ensure_env
+from readwise_twos_sync import json_utils
 from readwise_twos_sync.capacities_client import CapacitiesClient
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fall back to Flask's stdlib json
+    orjson = None
+try:
+    from kombu.exceptions import OperationalError as BrokerUnavailable
+except ImportError:  # pragma: no cover - Celery isn't installed
+    BrokerUnavailable = OSError
 
 # Load environment variables
-load_dotenv()
+ensure_env()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (LOG_LEVEL=DEBUG enables request dumps in development)
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__, static_folder='../static', static_url_path='/static')
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes and decodes with orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+if orjson:
+    app.json = OrjsonProvider(app)
+
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-change-in-production')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
@@ -46,6 +79,17 @@ app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=30)
 if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
     app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
 
+# Keep warm PostgreSQL connections and drop ones Railway has culled while idle.
+# Pool sizes can be raised via DB_POOL_SIZE / DB_MAX_OVERFLOW for busy workers.
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql://'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_pre_ping': True,
+        'pool_recycle': 280,
+        'connect_args': {'keepalives': 1, 'keepalives_idle': 60}
+    }
+
 # Initialize extensions
 db = SQLAlchemy(app)
 jwt = JWTManager(app)
@@ -69,14 +113,21 @@ CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 # Encryption for API tokens
 encryption_key = os.environ.get('ENCRYPTION_KEY')
 if encryption_key:
-    cipher_suite = Fernet(encryption_key.encode())
+    fernet_key = encryption_key.encode()
 else:
-    cipher_suite = Fernet(Fernet.generate_key())
+    fernet_key = Fernet.generate_key()
     logger.warning("No ENCRYPTION_KEY provided, using generated key")
+token_cipher = TokenCipher(fernet_key)
+cipher_suite = token_cipher.fernet
+encrypt_token = token_cipher.encrypt
+decrypt_token = token_cipher.decrypt
 
 # Database Models
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_provider', 'auth_provider', 'auth_provider_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
@@ -96,7 +147,7 @@ class ApiCredential(db.Model):
     __tablename__ = 'api_credentials'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     readwise_token = db.Column(db.Text, nullable=False)
     twos_user_id = db.Column(db.String(255))
     twos_token = db.Column(db.Text)
@@ -107,6 +158,9 @@ class ApiCredential(db.Model):
 
 class SyncLog(db.Model):
     __tablename__ = 'sync_logs'
+    __table_args__ = (
+        db.Index('ix_sync_logs_user_created', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -115,6 +169,32 @@ class SyncLog(db.Model):
     details = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+# ---- Cached Auth Queries ----
+
+@lru_cache(maxsize=1)
+def dummy_password_hash():
+    """Hash checked in place of a real one when the login email has no password.
+    
+    Built on the first login attempt rather than at import, so loading the
+    app doesn't pay for a full-strength hash.
+    """
+    return generate_password_hash(os.urandom(16).hex())
+
+def find_user_by_email(email):
+    """Look up a user by email with a cached lambda statement."""
+    stmt = lambda_stmt(lambda: select(User).where(User.email == email))
+    return db.session.execute(stmt).scalar_one_or_none()
+
+def find_user_by_provider(auth_provider, auth_provider_id):
+    """Look up a user by OAuth provider identity with a cached lambda statement."""
+    stmt = lambda_stmt(
+        lambda: select(User).where(
+            User.auth_provider == auth_provider,
+            User.auth_provider_id == auth_provider_id
+        )
+    )
+    return db.session.execute(stmt).scalars().first()
+
 # ---- Admin Authentication ----
 
 def require_admin():
@@ -175,9 +255,14 @@ def root():
         }
     })
 
+@lru_cache(maxsize=1)
+def _utc_timestamp(second):
+    """ISO timestamp for a whole UTC second, formatted once per second."""
+    return datetime.utcfromtimestamp(second).isoformat()
+
 @app.route('/health')
 def health():
-    return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
+    return jsonify({'status': 'healthy', 'timestamp': _utc_timestamp(int(time.time()))})
 
 @app.route('/debug')
 @require_admin()
@@ -240,9 +325,10 @@ def register():
         
     try:
         # Log request data for debugging
-        logger.info(f"Registration request received")
-        logger.info(f"Request headers: {dict(request.headers)}")
-        logger.info(f"Request data: {request.data}")
+        logger.info("Registration request received")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request headers: %s", dict(request.headers))
+            logger.debug("Request data: %s", request.data)
         
         # Handle both JSON and form data
         if request.is_json:
@@ -250,17 +336,15 @@ def register():
         else:
             data = request.form.to_dict()
         
-        logger.info(f"Parsed data: {data}")
-        
         # Validate required fields
         if not data or 'email' not in data or 'password' not in data:
-            logger.error(f"Missing required fields: {data}")
+            logger.error("Missing required fields: %s", sorted(data or {}))
             return jsonify({"error": "Email and password are required"}), 400
         
         # Check if user already exists
-        existing_user = User.query.filter_by(email=data['email']).first()
+        existing_user = find_user_by_email(data['email'])
         if existing_user:
-            logger.info(f"User already exists: {data['email']}")
+            logger.info("User already exists: %s", data['email'])
             return jsonify({"error": "Email already registered"}), 400
         
         # Create new user
@@ -271,10 +355,10 @@ def register():
             auth_provider='local'
         )
         
-        logger.info(f"Creating user: {user.email}")
+        logger.info("Creating user: %s", user.email)
         db.session.add(user)
         db.session.commit()
-        logger.info(f"User created successfully: {user.id}")
+        logger.info("User created successfully: %s", user.id)
         
         # Generate token
         access_token = create_access_token(identity=str(user.id))
@@ -286,10 +370,7 @@ def register():
         }), 201
         
     except Exception as e:
-        logger.error(f"Registration error: {str(e)}")
-        logger.error(f"Exception type: {type(e)}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Registration error: %s", e)
         db.session.rollback()
         return jsonify({"error": f"Registration failed: {str(e)}"}), 500
 
@@ -302,32 +383,37 @@ def login():
         else:
             data = request.form.to_dict()
         
-        logger.info(f"Login attempt for email: {data.get('email', 'unknown')}")
+        logger.info("Login attempt for email: %s", data.get('email', 'unknown'))
         
         # Validate required fields
         if not data or 'email' not in data or 'password' not in data:
             return jsonify({"error": "Email and password are required"}), 400
         
-        user = User.query.filter_by(email=data['email']).first()
+        user = find_user_by_email(data['email'])
+        
+        # Always verify against a hash so unknown emails take as long as
+        # wrong passwords and can't be told apart by response time
+        password_hash = user.password_hash if user and user.password_hash else dummy_password_hash()
+        password_ok = check_password_hash(password_hash, data['password'])
         
         if not user:
-            logger.info(f"User not found: {data['email']}")
+            logger.info("User not found: %s", data['email'])
             return jsonify({"error": "Invalid email or password"}), 401
         
-        if user.password_hash and not check_password_hash(user.password_hash, data['password']):
-            logger.info(f"Invalid password for user: {data['email']}")
+        if not user.password_hash or not password_ok:
+            logger.info("Invalid password for user: %s", data['email'])
             return jsonify({"error": "Invalid email or password"}), 401
         
         access_token = create_access_token(identity=str(user.id))
         
-        logger.info(f"Successful login for user: {data['email']}")
+        logger.info("Successful login for user: %s", data['email'])
         return jsonify({
             "access_token": access_token,
             "user": {"id": user.id, "email": user.email, "name": user.name}
         }), 200
         
     except Exception as e:
-        logger.error(f"Login error: {str(e)}")
+        logger.error("Login error: %s", e)
         return jsonify({"error": "Login failed"}), 500
 
 @app.route('/auth/login/google')
@@ -379,14 +465,11 @@ def google_callback():
         
         if user_info:
             # Find or create user
-            user = User.query.filter_by(
-                auth_provider='google',
-                auth_provider_id=user_info['sub']
-            ).first()
+            user = find_user_by_provider('google', user_info['sub'])
             
             if not user:
                 # Check if user exists with same email
-                user = User.query.filter_by(email=user_info['email']).first()
+                user = find_user_by_email(user_info['email'])
                 if user:
                     # Update existing user with Google info
                     user.auth_provider = 'google'
@@ -461,12 +544,12 @@ def save_credentials():
         capacities_token = data.get('capacities_token') or None
 
         # Encrypt sensitive data
-        encrypted_readwise_token = cipher_suite.encrypt(readwise_token.encode()).decode()
+        encrypted_readwise_token = encrypt_token(readwise_token)
         encrypted_twos_token = (
-            cipher_suite.encrypt(twos_token.encode()).decode() if twos_token else None
+            encrypt_token(twos_token) if twos_token else None
         )
         encrypted_capacities_token = (
-            cipher_suite.encrypt(capacities_token.encode()).decode()
+            encrypt_token(capacities_token)
             if capacities_token else None
         )
 
@@ -539,13 +622,13 @@ def get_credentials():
             return jsonify({"message": "No credentials found", "has_credentials": False}), 404
         
         # Decrypt tokens before returning
-        readwise_token = cipher_suite.decrypt(creds.readwise_token.encode()).decode()
+        readwise_token = decrypt_token(creds.readwise_token)
         twos_token = (
-            cipher_suite.decrypt(creds.twos_token.encode()).decode()
+            decrypt_token(creds.twos_token)
             if creds.twos_token else None
         )
         capacities_token = (
-            cipher_suite.decrypt(creds.capacities_token.encode()).decode()
+            decrypt_token(creds.capacities_token)
             if creds.capacities_token else None
         )
 
@@ -563,6 +646,12 @@ def get_credentials():
         return jsonify({"error": f"Failed to get credentials: {str(e)}"}), 500
 
 # Sync functions
+
+# Keep-alive session shared by the Readwise and Twos calls below, so a sync
+# reuses pooled TLS connections instead of opening one per request
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
 def perform_sync(readwise_token, twos_user_id, twos_token, capacities_token=None, capacities_space_id=None, days_back=7, user_id=None):
     """Perform a sync from Readwise to Twos and Capacities."""
     logger.info(f"Starting sync for user {user_id}, looking back {days_back} days")
@@ -572,8 +661,21 @@ def perform_sync(readwise_token, twos_user_id, twos_token, capacities_token=None
         since_time = datetime.utcnow() - timedelta(days=days_back)
         since = since_time.isoformat()
         
-        # Fetch highlights
-        highlights = fetch_highlights_since(readwise_token, since)
+        # Start the books request alongside the highlights one. It is only
+        # waited on when there are highlights to format; otherwise it
+        # finishes in the background and just refreshes the books cache.
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            books_future = executor.submit(fetch_all_books, readwise_token, user_id)
+            highlights = fetch_highlights_since(readwise_token, since)
+            books = books_future.result() if highlights else {}
+        finally:
+            executor.shutdown(wait=False)
+        
+        # Only the first books page is revalidated, so a cached list can miss
+        # books added on later pages; refetch rather than drop their highlights
+        if any(highlight.get("book_id") not in books for highlight in highlights):
+            books = fetch_all_books(readwise_token, user_id, refresh=True)
 
         capacities_client = None
         if capacities_token and capacities_space_id:
@@ -582,7 +684,6 @@ def perform_sync(readwise_token, twos_user_id, twos_token, capacities_token=None
             )
 
         if highlights:
-            books = fetch_all_books(readwise_token)
             if twos_user_id and twos_token:
                 post_highlights_to_twos(highlights, books, twos_user_id, twos_token)
             if capacities_client:
@@ -628,16 +729,73 @@ def perform_sync(readwise_token, twos_user_id, twos_token, capacities_token=None
         
         raise
 
-def fetch_all_books(readwise_token):
-    """Fetch all books from Readwise."""
+# Book metadata keyed by user id, along with the validators from the first
+# page so later syncs can revalidate with a single conditional GET. Entries
+# hold a digest of the token they were fetched with, never the token itself,
+# and the least recently used user is evicted past BOOKS_CACHE_SIZE.
+BOOKS_CACHE_SIZE = 256
+_books_cache = OrderedDict()
+_books_cache_lock = threading.Lock()
+
+def _token_digest(readwise_token):
+    return hashlib.sha256(readwise_token.encode("utf-8")).hexdigest()
+
+def _get_cached_books(user_id, readwise_token):
+    """Return the cache entry for ``user_id`` if it was built with this token."""
+    if user_id is None:
+        return None
+    with _books_cache_lock:
+        cached = _books_cache.get(user_id)
+        if not cached or cached["token_digest"] != _token_digest(readwise_token):
+            return None
+        _books_cache.move_to_end(user_id)
+        return cached
+
+def _store_cached_books(user_id, readwise_token, entry):
+    if user_id is None:
+        return
+    entry["token_digest"] = _token_digest(readwise_token)
+    with _books_cache_lock:
+        _books_cache[user_id] = entry
+        _books_cache.move_to_end(user_id)
+        while len(_books_cache) > BOOKS_CACHE_SIZE:
+            _books_cache.popitem(last=False)
+
+def fetch_all_books(readwise_token, user_id=None, refresh=False):
+    """Fetch all books from Readwise, reusing the cached list when unchanged.
+    
+    Only syncs for a known ``user_id`` are cached. ``refresh`` skips the
+    cached list and refetches every page.
+    """
     headers = {"Authorization": f"Token {readwise_token}"}
     books = {}
     next_url = "https://readwise.io/api/v2/books/"
     
+    # Send ETag / Last-Modified validators on the first page request
+    cached = None if refresh else _get_cached_books(user_id, readwise_token)
+    first_page_headers = dict(headers)
+    if cached:
+        if cached["etag"]:
+            first_page_headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            first_page_headers["If-Modified-Since"] = cached["last_modified"]
+    validators = None
+    
     while next_url:
         try:
-            response = requests.get(next_url, headers=headers, timeout=30)
-            response.raise_for_status()
+            if validators is None:
+                response = http_session.get(next_url, headers=first_page_headers, timeout=30)
+                if cached and response.status_code == 304:
+                    logger.info("Readwise books unchanged, using cached metadata")
+                    return cached["books"]
+                response.raise_for_status()
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified")
+                }
+            else:
+                response = http_session.get(next_url, headers=headers, timeout=30)
+                response.raise_for_status()
             data = response.json()
             
             for book in data.get("results", []):
@@ -656,6 +814,9 @@ def fetch_all_books(readwise_token):
             logger.error(f"Error fetching books: {e}")
             raise
     
+    if validators and (validators["etag"] or validators["last_modified"]):
+        _store_cached_books(user_id, readwise_token, dict(validators, books=books))
+    
     return books
 
 def fetch_highlights_since(readwise_token, since):
@@ -667,7 +828,7 @@ def fetch_highlights_since(readwise_token, since):
     
     while next_url:
         try:
-            response = requests.get(next_url, headers=headers, params=params, timeout=30)
+            response = http_session.get(next_url, headers=headers, params=params, timeout=30)
             response.raise_for_status()
             data = response.json()
             
@@ -684,11 +845,13 @@ def fetch_highlights_since(readwise_token, since):
     
     return highlights
 
+# Highlights sent per Twos request; each batch is posted as one note
+TWOS_BATCH_SIZE = 50
+
 def post_highlights_to_twos(highlights, books, twos_user_id, twos_token):
     """Post highlights to Twos."""
     api_url = "https://www.twosapp.com/apiV2/user/addToToday"
     headers = {"Content-Type": "application/json"}
-    today_title = datetime.now().strftime("%a %b %d, %Y")
     
     # Debug logging
     logger.info(f"Posting to Twos with user_id: {twos_user_id}")
@@ -705,7 +868,7 @@ def post_highlights_to_twos(highlights, books, twos_user_id, twos_token):
         logger.info(f"Sending payload to Twos: {payload}")
         
         try:
-            response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+            response = http_session.post(api_url, headers=headers, data=json_utils.dumps(payload), timeout=30)
             logger.info(f"Twos API response status: {response.status_code}")
             logger.info(f"Twos API response: {response.text}")
             response.raise_for_status()
@@ -713,38 +876,36 @@ def post_highlights_to_twos(highlights, books, twos_user_id, twos_token):
             logger.error(f"Failed to post no-highlights message: {e}")
         return
     
+    # Build every note line up front, skipping highlights without book metadata
+    note_lines = [
+        f"{books[highlight.get('book_id')]['title']}, "
+        f"{books[highlight.get('book_id')]['author']}: {highlight.get('text')}".strip()
+        for highlight in highlights
+        if highlight.get("book_id") in books
+    ]
+    
     successful_posts = 0
-    for highlight in highlights:
+    for start in range(0, len(note_lines), TWOS_BATCH_SIZE):
+        batch = note_lines[start:start + TWOS_BATCH_SIZE]
         try:
-            book_id = highlight.get("book_id")
-            text = highlight.get("text")
-            book_meta = books.get(book_id)
-            
-            if not book_meta:
-                continue
-            
-            title = book_meta["title"]
-            author = book_meta["author"]
-            note_text = f"{title}, {author}: {text}"
-            
             payload = {
-                "text": note_text.strip(),
+                "text": "\n".join(batch),
                 "user_id": twos_user_id,
                 "token": twos_token
             }
             
             # Debug logging
-            logger.info(f"Sending highlight to Twos: {note_text[:50]}...")
+            logger.info(f"Sending {len(batch)} highlights to Twos")
             
-            response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+            response = http_session.post(api_url, headers=headers, data=json_utils.dumps(payload), timeout=30)
             logger.info(f"Twos API response status: {response.status_code}")
             if response.status_code != 200:
                 logger.info(f"Twos API error response: {response.text}")
             response.raise_for_status()
-            successful_posts += 1
+            successful_posts += len(batch)
             
         except requests.RequestException as e:
-            logger.error(f"Failed to post highlight: {e}")
+            logger.error(f"Failed to post highlights batch: {e}")
     
     return successful_posts
 
@@ -752,6 +913,41 @@ def post_highlights_to_twos(highlights, books, twos_user_id, twos_token):
 
 # ---- Sync Routes ----
 
+def load_sync_task():
+    """Import the Celery sync task, or return None if Celery isn't available."""
+    try:
+        try:
+            from .tasks import sync_user
+        except ImportError:  # pragma: no cover - fallback for direct execution
+            from tasks import sync_user
+    except ImportError as e:
+        logger.warning(f"Sync queue unavailable: {e}")
+        return None
+    return sync_user
+
+def enqueue_sync(user_id, days_back):
+    """Queue a sync on the Celery worker and return its job id.
+    
+    Returns None when no broker is configured or it can't be reached, in
+    which case the caller runs the sync inline.
+    """
+    if not os.environ.get('REDIS_URL'):
+        return None
+    
+    sync_user = load_sync_task()
+    if sync_user is None:
+        return None
+    
+    try:
+        # Fail fast rather than retrying the publish while the request waits
+        job = sync_user.apply_async(args=(user_id, days_back), retry=False)
+    except (BrokerUnavailable, OSError) as e:
+        logger.warning(f"Sync queue unreachable, running sync inline: {e}")
+        return None
+    
+    logger.info(f"Queued sync job {job.id} for user {user_id}")
+    return job.id
+
 @app.route('/api/sync', methods=['POST', 'OPTIONS'])
 def trigger_sync():
     """Manually trigger a sync for a user."""
@@ -791,14 +987,20 @@ def trigger_sync():
         if not creds:
             return jsonify({"error": "No API credentials found"}), 404
         
+        # Hand the sync to the Celery worker when a broker is configured so
+        # the web worker isn't held for the duration of the external calls
+        job_id = enqueue_sync(user_id, days_back)
+        if job_id is not None:
+            return jsonify({"job_id": job_id, "status": "queued"}), 202
+        
         # Decrypt tokens
-        readwise_token = cipher_suite.decrypt(creds.readwise_token.encode()).decode()
+        readwise_token = decrypt_token(creds.readwise_token)
         twos_token = (
-            cipher_suite.decrypt(creds.twos_token.encode()).decode()
+            decrypt_token(creds.twos_token)
             if creds.twos_token else None
         )
         capacities_token = (
-            cipher_suite.decrypt(creds.capacities_token.encode()).decode()
+            decrypt_token(creds.capacities_token)
             if creds.capacities_token else None
         )
 
@@ -835,6 +1037,66 @@ def trigger_sync():
         logger.error(f"Error in sync endpoint: {str(e)}")
         return jsonify({"error": f"Sync request failed: {str(e)}"}), 500
 
+@app.route('/api/sync/status/<job_id>', methods=['GET', 'OPTIONS'])
+def get_sync_status(job_id):
+    """Get the status of a queued sync job."""
+    # Handle OPTIONS request for CORS
+    if request.method == 'OPTIONS':
+        return jsonify({}), 200
+    
+    # For GET requests, require JWT
+    try:
+        # Get the Authorization header
+        auth_header = request.headers.get('Authorization')
+        if not auth_header or not auth_header.startswith('Bearer '):
+            logger.error("No Bearer token found in Authorization header")
+            return jsonify({"error": "Authentication required"}), 401
+        
+        # Extract the token
+        token = auth_header.split(' ')[1]
+        
+        # Manually decode the token
+        from flask_jwt_extended import decode_token
+        decoded_token = decode_token(token)
+        user_id = int(decoded_token['sub'])  # Convert to integer for database queries
+        
+        logger.info(f"Successfully authenticated user {user_id}")
+    except Exception as e:
+        logger.error(f"JWT verification failed: {str(e)}")
+        return jsonify({"error": "Authentication required"}), 401
+    
+    sync_user = load_sync_task() if os.environ.get('REDIS_URL') else None
+    if sync_user is None:
+        return jsonify({"error": "Sync queue is not configured"}), 404
+    
+    try:
+        job = sync_user.AsyncResult(job_id)
+        
+        # A task that raised carries no result to check ownership against,
+        # so report the failure without its details
+        if job.state in ('FAILURE', 'REVOKED'):
+            return jsonify({"job_id": job_id, "status": "failed", "error": "Sync failed"}), 200
+        
+        if not job.ready():
+            return jsonify({"job_id": job_id, "status": job.state.lower()}), 200
+        
+        result = job.result if isinstance(job.result, dict) else {}
+        if result.get('user_id') != user_id:
+            return jsonify({"error": "Sync job not found"}), 404
+        
+        if not result.get('success'):
+            return jsonify({
+                "job_id": job_id,
+                "status": "failed",
+                "error": result.get('error', "Sync failed")
+            }), 200
+        
+        return jsonify({"job_id": job_id, "status": "finished", "result": result}), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting sync status: {str(e)}")
+        return jsonify({"error": f"Failed to get sync status: {str(e)}"}), 500
+
 @app.route('/api/sync/settings', methods=['POST', 'OPTIONS'])
 def update_sync_settings():
     """Update sync settings for a user."""
@@ -1015,6 +1277,10 @@ def get_user_profile():
 
 # ---- Scheduler Functions ----
 
+# Sync times are interpreted in this deployment's timezone. Servers run on
+# UTC, so this is fixed rather than detected from the host.
+SYNC_TZ = pytz.timezone('America/Chicago')
+
 def schedule_sync_job(user_id):
     """Schedule a daily sync job for a user."""
     user = User.query.get(user_id)
@@ -1025,25 +1291,12 @@ def schedule_sync_job(user_id):
     # Parse sync time (format: "HH:MM")
     hour, minute = map(int, user.sync_time.split(':'))
     
-    # Get the system's local timezone - detect automatically
-    try:
-        # Try to get system timezone
-        import time
-        local_tz_name = time.tzname[time.daylight]
-        if local_tz_name in ['CDT', 'CST']:
-            local_tz = pytz.timezone('America/Chicago')
-        else:
-            # Fallback to system timezone
-            local_tz = pytz.timezone('America/Chicago')  # Default for this deployment
-    except:
-        # Fallback to Chicago timezone
-        local_tz = pytz.timezone('America/Chicago')
+    # Sync times are wall-clock times in the deployment's timezone
+    local_tz = SYNC_TZ
     
     # Remove existing job if it exists
-    try:
+    if scheduler.get_job(f"sync_user_{user_id}") is not None:
         scheduler.remove_job(f"sync_user_{user_id}")
-    except:
-        pass
     
     # Schedule new job with timezone
     if user.sync_frequency == 'daily':
@@ -1085,13 +1338,13 @@ def run_scheduled_sync(user_id):
 
         try:
             # Decrypt tokens
-            readwise_token = cipher_suite.decrypt(creds.readwise_token.encode()).decode()
+            readwise_token = decrypt_token(creds.readwise_token)
             twos_token = (
-                cipher_suite.decrypt(creds.twos_token.encode()).decode()
+                decrypt_token(creds.twos_token)
                 if creds.twos_token else None
             )
             capacities_token = (
-                cipher_suite.decrypt(creds.capacities_token.encode()).decode()
+                decrypt_token(creds.capacities_token)
                 if creds.capacities_token else None
             )
 
@@ -1123,6 +1376,17 @@ def run_scheduled_sync(user_id):
 
 # ---- Debug Endpoints ----
 
+def wants_ndjson():
+    """Check whether the client asked for a streamed NDJSON response."""
+    return 'application/x-ndjson' in request.headers.get('Accept', '')
+
+def ndjson_response(rows):
+    """Stream rows as newline-delimited JSON, one object per line."""
+    def generate():
+        for row in rows:
+            yield app.json.dumps(row) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/debug/users', methods=['GET'])
 @require_admin()
 def debug_list_users():
@@ -1130,24 +1394,40 @@ def debug_list_users():
     logger.info("Debug: Listing all users")
     
     try:
-        users = User.query.all()
-        
-        user_list = []
-        for user in users:
-            # Check if user has credentials
-            creds = ApiCredential.query.filter_by(user_id=user.id).first()
-            
-            user_list.append({
+        # Join credentials in the same query instead of one lookup per user,
+        # matching only each user's first row so extra rows don't repeat them
+        other_creds = aliased(ApiCredential)
+        first_cred_id = (
+            select(func.min(other_creds.id))
+            .where(other_creds.user_id == User.id)
+            .scalar_subquery()
+        )
+        rows = (
+            db.session.query(User, ApiCredential)
+            .outerjoin(ApiCredential, and_(
+                ApiCredential.user_id == User.id,
+                ApiCredential.id == first_cred_id
+            ))
+            .order_by(User.id)
+            .yield_per(1000)
+        )
+        user_list = (
+            {
                 "id": user.id,
                 "email": user.email,
                 "sync_enabled": user.sync_enabled,
                 "sync_time": user.sync_time,
                 "has_credentials": creds is not None,
                 "twos_user_id": creds.twos_user_id if creds else None
-            })
+            }
+            for user, creds in rows
+        )
+        
+        if wants_ndjson():
+            return ndjson_response(user_list)
         
         return jsonify({
-            "users": user_list
+            "users": list(user_list)
         }), 200
     except Exception as e:
         logger.error(f"Debug: Error listing users: {e}")
@@ -1181,11 +1461,11 @@ def debug_trigger_sync(user_id):
         
         try:
             # Decrypt tokens
-            readwise_token = cipher_suite.decrypt(creds.readwise_token.encode()).decode()
+            readwise_token = decrypt_token(creds.readwise_token)
             logger.info(f"Debug: Successfully decrypted Readwise token")
             
             twos_token = (
-                cipher_suite.decrypt(creds.twos_token.encode()).decode()
+                decrypt_token(creds.twos_token)
                 if creds.twos_token else None
             )
             if twos_token:
@@ -1304,11 +1584,9 @@ def debug_reset_password(user_id, new_password):
 def admin_get_users():
     """Get all users for admin interface."""
     try:
-        users = User.query.all()
-        users_data = []
-        
-        for user in users:
-            users_data.append({
+        users = User.query.order_by(User.id).yield_per(1000)
+        users_data = (
+            {
                 'id': user.id,
                 'email': user.email,
                 'name': user.name,
@@ -1317,9 +1595,14 @@ def admin_get_users():
                 'sync_time': user.sync_time,
                 'sync_frequency': user.sync_frequency,
                 'created_at': user.created_at.isoformat() if user.created_at else None
-            })
+            }
+            for user in users
+        )
         
-        return jsonify(users_data), 200
+        if wants_ndjson():
+            return ndjson_response(users_data)
+        
+        return jsonify(list(users_data)), 200
         
     except Exception as e:
         logger.error(f"Error getting users: {e}")
@@ -1520,7 +1803,7 @@ def debug_scheduler_jobs():
         
         # Also show current time in different timezones
         now_utc = datetime.now(pytz.UTC)
-        now_chicago = now_utc.astimezone(pytz.timezone('America/Chicago'))
+        now_chicago = now_utc.astimezone(SYNC_TZ)
         
         return jsonify({
             "scheduler_running": scheduler.running if 'scheduler' in globals() and scheduler else False,
@@ -1569,18 +1852,22 @@ def debug_simple():
 with app.app_context():
     db.create_all()
     ensure_capacities_columns(db.engine)
+    ensure_indexes(db.engine, db.metadata)
 
 jobstores = {
     'default': SQLAlchemyJobStore(url=app.config['SQLALCHEMY_DATABASE_URI'])
 }
 scheduler = BackgroundScheduler(jobstores=jobstores)
-scheduler.start()
 
-# Schedule sync jobs for all existing users
-with app.app_context():
-    users = User.query.filter_by(sync_enabled=True).all()
-    for user in users:
-        schedule_sync_job(user.id)
+# Background workers import the app without running scheduled jobs
+if os.environ.get('ENABLE_SCHEDULER', 'true').lower() != 'false':
+    scheduler.start()
+
+    # Schedule sync jobs for all existing users
+    with app.app_context():
+        users = User.query.filter_by(sync_enabled=True).all()
+        for user in users:
+            schedule_sync_job(user.id)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
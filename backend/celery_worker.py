@@ -13,6 +13,7 @@ load_dotenv()
 celery = Celery(
     'readwise_twos_sync',
     broker=os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    backend=os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
     include=['tasks']
 )
 
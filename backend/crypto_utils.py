@@ -0,0 +1,39 @@
+import base64
+import os
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+TOKEN_PREFIX = 'v2:'
+
+
+class TokenCipher:
+    """Encrypt stored API tokens with AES-GCM.
+
+    The AES key is derived from the Fernet ENCRYPTION_KEY, and Fernet is kept
+    to decrypt tokens stored before the switch.
+    """
+
+    def __init__(self, fernet_key):
+        self.fernet = Fernet(fernet_key)
+        self.aead = AESGCM(HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=b'readwise-twos-sync api tokens'
+        ).derive(base64.urlsafe_b64decode(fernet_key)))
+
+    def encrypt(self, token):
+        """Encrypt an API token for storage."""
+        nonce = os.urandom(12)
+        sealed = self.aead.encrypt(nonce, token.encode(), None)
+        return TOKEN_PREFIX + base64.urlsafe_b64encode(nonce + sealed).decode()
+
+    def decrypt(self, stored):
+        """Decrypt a stored API token, including legacy Fernet tokens."""
+        if stored.startswith(TOKEN_PREFIX):
+            raw = base64.urlsafe_b64decode(stored[len(TOKEN_PREFIX):])
+            return self.aead.decrypt(raw[:12], raw[12:], None).decode()
+        return self.fernet.decrypt(stored.encode()).decode()
@@ -1,5 +1,15 @@
+import logging
+
 from sqlalchemy import inspect, text
 
+try:
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+except ImportError:  # pragma: no cover - Alembic ships with Flask-Migrate
+    MigrationContext = Operations = None
+
+logger = logging.getLogger(__name__)
+
 
 def ensure_capacities_columns(engine):
     """Ensure api_credentials table has Capacities columns."""
@@ -13,14 +23,50 @@ def ensure_capacities_columns(engine):
         statements.append(text("ALTER TABLE api_credentials ADD COLUMN capacities_space_id VARCHAR(255)"))
     if 'capacities_token' not in columns:
         statements.append(text("ALTER TABLE api_credentials ADD COLUMN capacities_token TEXT"))
-    # Ensure Twos columns are nullable
-    twos_user_col = columns.get('twos_user_id')
-    if twos_user_col and not twos_user_col.get('nullable', True):
-        statements.append(text("ALTER TABLE api_credentials ALTER COLUMN twos_user_id DROP NOT NULL"))
-    twos_token_col = columns.get('twos_token')
-    if twos_token_col and not twos_token_col.get('nullable', True):
-        statements.append(text("ALTER TABLE api_credentials ALTER COLUMN twos_token DROP NOT NULL"))
     if statements:
         with engine.begin() as conn:
             for stmt in statements:
                 conn.execute(stmt)
+
+    # Ensure Twos columns are nullable
+    not_null_columns = [
+        name for name in ('twos_user_id', 'twos_token')
+        if name in columns and not columns[name].get('nullable', True)
+    ]
+    if not_null_columns:
+        relax_not_null(engine, 'api_credentials', not_null_columns)
+
+
+def relax_not_null(engine, table, column_names):
+    """Drop NOT NULL from ``column_names``, rebuilding the table on SQLite."""
+    if engine.dialect.name != 'sqlite':
+        with engine.begin() as conn:
+            for name in column_names:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {name} DROP NOT NULL"))
+        return
+
+    # SQLite has no ALTER COLUMN; Alembic's batch mode copies the table
+    # once with every column relaxed
+    if Operations is None:
+        logger.warning(
+            "Alembic is not installed; cannot make %s nullable on SQLite",
+            ", ".join(column_names)
+        )
+        return
+    with engine.begin() as conn:
+        op = Operations(MigrationContext.configure(conn))
+        with op.batch_alter_table(table) as batch_op:
+            for name in column_names:
+                batch_op.alter_column(name, nullable=True)
+
+
+def ensure_indexes(engine, metadata):
+    """Create model indexes that are missing from existing tables."""
+    inspector = inspect(engine)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
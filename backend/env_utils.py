@@ -0,0 +1,14 @@
+from functools import lru_cache
+
+from dotenv import find_dotenv, load_dotenv
+
+
+@lru_cache(maxsize=1)
+def ensure_env():
+    """Load the nearest .env into os.environ once per process.
+
+    Scripts call this before importing the app, which calls it again; only
+    the first call reads the file. Existing environment variables win.
+    """
+    load_dotenv(find_dotenv(usecwd=True))
+    return True
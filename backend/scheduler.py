@@ -16,8 +16,11 @@ from cryptography.fernet import Fernet
 import pytz
 try:
     from .db_utils import ensure_capacities_columns
+    from .crypto_utils import TokenCipher
 except ImportError:  # pragma: no cover
     from db_utils import ensure_capacities_columns
+    from crypto_utils import TokenCipher
+from readwise_twos_sync import json_utils
 from readwise_twos_sync.capacities_client import CapacitiesClient
 
 # Load environment variables
@@ -27,6 +30,10 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sync times are interpreted in this deployment's timezone. Servers run on
+# UTC, so this is fixed rather than detected from the host.
+SYNC_TZ = pytz.timezone('America/Chicago')
+
 # Database configuration
 DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
 if DATABASE_URL.startswith('postgres://'):
@@ -40,9 +47,9 @@ Session = sessionmaker(bind=engine)
 # Encryption for API tokens
 encryption_key = os.environ.get('ENCRYPTION_KEY')
 if encryption_key:
-    cipher_suite = Fernet(encryption_key.encode())
+    token_cipher = TokenCipher(encryption_key.encode())
 else:
-    cipher_suite = Fernet(Fernet.generate_key())
+    token_cipher = TokenCipher(Fernet.generate_key())
     logger.warning("No ENCRYPTION_KEY provided, using generated key")
 
 # Define ORM models
@@ -158,7 +165,7 @@ def post_highlights_to_twos(highlights, books, twos_user_id, twos_token):
         logger.info(f"Sending payload to Twos: {payload}")
         
         try:
-            response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+            response = requests.post(api_url, headers=headers, data=json_utils.dumps(payload), timeout=30)
             logger.info(f"Twos API response status: {response.status_code}")
             logger.info(f"Twos API response: {response.text}")
             response.raise_for_status()
@@ -189,7 +196,7 @@ def post_highlights_to_twos(highlights, books, twos_user_id, twos_token):
             # Debug logging
             logger.info(f"Sending highlight to Twos: {note_text[:50]}...")
             
-            response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+            response = requests.post(api_url, headers=headers, data=json_utils.dumps(payload), timeout=30)
             logger.info(f"Twos API response status: {response.status_code}")
             if response.status_code != 200:
                 logger.info(f"Twos API error response: {response.text}")
@@ -290,13 +297,13 @@ def run_scheduled_sync(user_id):
     
     try:
         # Decrypt tokens
-        readwise_token = cipher_suite.decrypt(creds_result.readwise_token.encode()).decode()
+        readwise_token = token_cipher.decrypt(creds_result.readwise_token)
         twos_token = (
-            cipher_suite.decrypt(creds_result.twos_token.encode()).decode()
+            token_cipher.decrypt(creds_result.twos_token)
             if creds_result.twos_token else None
         )
         capacities_token = (
-            cipher_suite.decrypt(creds_result.capacities_token.encode()).decode()
+            token_cipher.decrypt(creds_result.capacities_token)
             if creds_result.capacities_token else None
         )
 
@@ -344,25 +351,12 @@ def schedule_sync_job(user_id, scheduler):
     # Parse sync time (format: "HH:MM")
     hour, minute = map(int, user_result.sync_time.split(':'))
     
-    # Get the system's local timezone - detect automatically
-    try:
-        # Try to get system timezone
-        import time
-        local_tz_name = time.tzname[time.daylight]
-        if local_tz_name in ['CDT', 'CST']:
-            local_tz = pytz.timezone('America/Chicago')
-        else:
-            # Fallback to system timezone
-            local_tz = pytz.timezone('America/Chicago')  # Default for this deployment
-    except:
-        # Fallback to Chicago timezone
-        local_tz = pytz.timezone('America/Chicago')
+    # Sync times are wall-clock times in the deployment's timezone
+    local_tz = SYNC_TZ
     
     # Remove existing job if it exists
-    try:
+    if scheduler.get_job(f"sync_user_{user_id}") is not None:
         scheduler.remove_job(f"sync_user_{user_id}")
-    except:
-        pass
     
     # Schedule new job with timezone
     if user_result.sync_frequency == 'daily':
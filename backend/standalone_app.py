@@ -18,6 +18,10 @@ from cryptography.fernet import Fernet
 import requests
 from dotenv import load_dotenv
 import pytz
+try:
+    from .crypto_utils import TokenCipher
+except ImportError:  # pragma: no cover
+    from crypto_utils import TokenCipher
 
 # Load environment variables
 load_dotenv()
@@ -63,9 +67,9 @@ CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 # Encryption for API tokens
 encryption_key = os.environ.get('ENCRYPTION_KEY')
 if encryption_key:
-    cipher_suite = Fernet(encryption_key.encode())
+    token_cipher = TokenCipher(encryption_key.encode())
 else:
-    cipher_suite = Fernet(Fernet.generate_key())
+    token_cipher = TokenCipher(Fernet.generate_key())
     logger.warning("No ENCRYPTION_KEY provided, using generated key")
 
 # Database Models
@@ -397,8 +401,8 @@ def save_credentials():
         logger.info(f"Saving credentials for user {user_id}")
         
         # Encrypt sensitive data
-        encrypted_readwise_token = cipher_suite.encrypt(data['readwise_token'].encode()).decode()
-        encrypted_twos_token = cipher_suite.encrypt(data['twos_token'].encode()).decode()
+        encrypted_readwise_token = token_cipher.encrypt(data['readwise_token'])
+        encrypted_twos_token = token_cipher.encrypt(data['twos_token'])
         
         # Check if credentials already exist
         creds = ApiCredential.query.filter_by(user_id=user_id).first()
@@ -697,8 +701,8 @@ def trigger_sync():
             return jsonify({"error": "No API credentials found"}), 404
         
         # Decrypt tokens
-        readwise_token = cipher_suite.decrypt(creds.readwise_token.encode()).decode()
-        twos_token = cipher_suite.decrypt(creds.twos_token.encode()).decode()
+        readwise_token = token_cipher.decrypt(creds.readwise_token)
+        twos_token = token_cipher.decrypt(creds.twos_token)
         
         # Perform actual sync
         try:
@@ -908,6 +912,10 @@ def get_user_profile():
 
 # ---- Scheduler Functions ----
 
+# Sync times are interpreted in this deployment's timezone. Servers run on
+# UTC, so this is fixed rather than detected from the host.
+SYNC_TZ = pytz.timezone('America/Chicago')
+
 def schedule_sync_job(user_id):
     """Schedule a daily sync job for a user."""
     user = User.query.get(user_id)
@@ -918,25 +926,12 @@ def schedule_sync_job(user_id):
     # Parse sync time (format: "HH:MM")
     hour, minute = map(int, user.sync_time.split(':'))
     
-    # Get the system's local timezone - detect automatically
-    try:
-        # Try to get system timezone
-        import time
-        local_tz_name = time.tzname[time.daylight]
-        if local_tz_name in ['CDT', 'CST']:
-            local_tz = pytz.timezone('America/Chicago')
-        else:
-            # Fallback to system timezone
-            local_tz = pytz.timezone('America/Chicago')  # Default for this deployment
-    except:
-        # Fallback to Chicago timezone
-        local_tz = pytz.timezone('America/Chicago')
+    # Sync times are wall-clock times in the deployment's timezone
+    local_tz = SYNC_TZ
     
     # Remove existing job if it exists
-    try:
+    if scheduler.get_job(f"sync_user_{user_id}") is not None:
         scheduler.remove_job(f"sync_user_{user_id}")
-    except:
-        pass
     
     # Schedule new job with timezone
     if user.sync_frequency == 'daily':
@@ -976,8 +971,8 @@ def run_scheduled_sync(user_id):
     
     try:
         # Decrypt tokens
-        readwise_token = cipher_suite.decrypt(creds.readwise_token.encode()).decode()
-        twos_token = cipher_suite.decrypt(creds.twos_token.encode()).decode()
+        readwise_token = token_cipher.decrypt(creds.readwise_token)
+        twos_token = token_cipher.decrypt(creds.twos_token)
         
         # Perform sync (only 1 day back for scheduled syncs)
         result = perform_sync(
@@ -1060,10 +1055,10 @@ def debug_trigger_sync(user_id):
         
         try:
             # Decrypt tokens
-            readwise_token = cipher_suite.decrypt(creds.readwise_token.encode()).decode()
+            readwise_token = token_cipher.decrypt(creds.readwise_token)
             logger.info(f"Debug: Successfully decrypted Readwise token")
             
-            twos_token = cipher_suite.decrypt(creds.twos_token.encode()).decode()
+            twos_token = token_cipher.decrypt(creds.twos_token)
             logger.info(f"Debug: Successfully decrypted Twos token")
             
             # Perform sync
@@ -1242,7 +1237,7 @@ def debug_scheduler_jobs():
         
         # Also show current time in different timezones
         now_utc = datetime.now(pytz.UTC)
-        now_chicago = now_utc.astimezone(pytz.timezone('America/Chicago'))
+        now_chicago = now_utc.astimezone(SYNC_TZ)
         
         return jsonify({
             "scheduler_running": scheduler.running if 'scheduler' in globals() and scheduler else False,
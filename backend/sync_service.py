@@ -5,6 +5,7 @@ Sync service for Readwise to Twos and Capacities
 import requests
 import logging
 from datetime import datetime, timedelta
+from readwise_twos_sync import json_utils
 from readwise_twos_sync.capacities_client import CapacitiesClient
 
 # Configure logging
@@ -145,7 +146,7 @@ def post_highlights_to_twos(highlights, books, twos_user_id, twos_token):
         }
         
         try:
-            response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+            response = requests.post(api_url, headers=headers, data=json_utils.dumps(payload), timeout=30)
             response.raise_for_status()
             logger.info("Posted 'no highlights' message to Twos")
         except requests.RequestException as e:
@@ -176,7 +177,7 @@ def post_highlights_to_twos(highlights, books, twos_user_id, twos_token):
                 "user_id": twos_user_id
             }
             
-            response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+            response = requests.post(api_url, headers=headers, data=json_utils.dumps(payload), timeout=30)
             response.raise_for_status()
             successful_posts += 1
             
@@ -0,0 +1,51 @@
+"""
+Background tasks for the Celery worker
+"""
+
+try:
+    from .celery_worker import celery
+except ImportError:  # pragma: no cover - fallback for direct execution
+    from celery_worker import celery
+
+
+@celery.task(name='tasks.sync_user')
+def sync_user(user_id, days_back=7):
+    """Run a Readwise sync for a user outside of the web request."""
+    try:
+        from .app import app, ApiCredential, decrypt_token, perform_sync, logger
+    except ImportError:  # pragma: no cover - fallback for direct execution
+        from app import app, ApiCredential, decrypt_token, perform_sync, logger
+
+    with app.app_context():
+        creds = ApiCredential.query.filter_by(user_id=user_id).first()
+
+        if not creds:
+            return {"success": False, "error": "No API credentials found", "user_id": user_id}
+
+        try:
+            # Decrypt tokens
+            readwise_token = decrypt_token(creds.readwise_token)
+            twos_token = (
+                decrypt_token(creds.twos_token)
+                if creds.twos_token else None
+            )
+            capacities_token = (
+                decrypt_token(creds.capacities_token)
+                if creds.capacities_token else None
+            )
+
+            # perform_sync records the SyncLog entry for both outcomes
+            result = perform_sync(
+                readwise_token=readwise_token,
+                twos_user_id=creds.twos_user_id,
+                twos_token=twos_token,
+                capacities_token=capacities_token,
+                capacities_space_id=creds.capacities_space_id,
+                days_back=days_back,
+                user_id=user_id
+            )
+            return dict(result, user_id=user_id)
+
+        except Exception as e:
+            logger.error(f"Queued sync failed for user {user_id}: {e}")
+            return {"success": False, "error": f"Sync failed: {str(e)}", "user_id": user_id}
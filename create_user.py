@@ -15,7 +15,9 @@ load_dotenv()
 os.environ['DATABASE_URL'] = 'sqlite:///app.db'
 
 # Add backend to path
-sys.path.append('backend')
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
 
 from app import app, User, db
 
@@ -12,7 +12,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Add backend to path
-sys.path.append('backend')
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
 
 def init_database():
     """Initialize database and create tables"""
@@ -13,11 +13,49 @@ from werkzeug.security import generate_password_hash
 load_dotenv()
 
 # Add backend to path
-sys.path.append('backend')
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+# Dialects that accept several comma-separated clauses in one ALTER TABLE
+MULTI_CLAUSE_ALTER_DIALECTS = {'postgresql', 'mysql', 'mariadb'}
+
+# Number of users updated per transaction
+USER_BATCH_SIZE = 100
+
+
+def apply_table_migrations(table, clauses):
+    """Apply ALTER TABLE clauses, batching them when the dialect allows it"""
+    from app import db
+
+    if db.engine.dialect.name in MULTI_CLAUSE_ALTER_DIALECTS:
+        sql = f"ALTER TABLE {table} " + ", ".join(clauses)
+        print(f"   Executing: {sql}")
+        try:
+            db.session.execute(text(sql))
+            db.session.commit()
+            print("   ✅ Success")
+            return
+        except Exception as e:
+            print(f"   ⚠️  Batched migration failed, retrying one by one: {e}")
+            db.session.rollback()
+
+    # SQLite only supports one clause per ALTER TABLE
+    for migration in clauses:
+        try:
+            sql = f"ALTER TABLE {table} {migration}"
+            print(f"   Executing: {sql}")
+            db.session.execute(text(sql))
+            db.session.commit()
+            print("   ✅ Success")
+        except Exception as e:
+            print(f"   ⚠️  Warning: {e}")
+            db.session.rollback()
 
 def migrate_database():
     """Migrate database schema to match current models"""
     from app import app, db, User
+    from db_utils import ensure_capacities_columns
     
     with app.app_context():
         print("🔄 Database Migration Script")
@@ -34,8 +72,8 @@ def migrate_database():
             return True
         
         # Get current columns
-        columns = [col['name'] for col in inspector.get_columns('users')]
-        print(f"📋 Current columns: {columns}")
+        columns = {col['name'] for col in inspector.get_columns('users')}
+        print(f"📋 Current columns: {sorted(columns)}")
         
         # Check for missing columns and add them
         migrations_needed = []
@@ -67,76 +105,58 @@ def migrate_database():
         # Apply migrations
         if migrations_needed:
             print(f"🔧 Applying {len(migrations_needed)} migrations...")
-            
-            for migration in migrations_needed:
-                try:
-                    sql = f"ALTER TABLE users {migration}"
-                    print(f"   Executing: {sql}")
-                    db.session.execute(text(sql))
-                    db.session.commit()
-                    print(f"   ✅ Success")
-                except Exception as e:
-                    print(f"   ⚠️  Warning: {e}")
-                    db.session.rollback()
+            apply_table_migrations('users', migrations_needed)
         else:
             print("✅ No migrations needed")
         
-        # Update existing users to have password_hash if they don't
+        # Update existing users to have password_hash and auth_provider.
+        # Walk the table in primary-key batches and commit each batch so
+        # large user tables are never loaded or locked all at once.
         print("\n🔑 Checking user passwords...")
-        users = User.query.all()
-        
-        for user in users:
-            if not user.password_hash:
-                # Set a default password for existing users
-                default_password = "481816Test!"
-                user.password_hash = generate_password_hash(default_password)
-                print(f"   Setting password for {user.email}: {default_password}")
-        
-        # Ensure auth_provider is set
-        for user in users:
-            if not user.auth_provider:
-                user.auth_provider = 'local'
-                print(f"   Setting auth_provider for {user.email}: local")
-        
-        db.session.commit()
+        default_password = "481816Test!"
+        total_users = 0
+        last_id = 0
+
+        # Every user without a password gets the same default, so hash it
+        # once, on first need, and reuse it
+        default_hash = None
+        while True:
+            batch = (
+                User.query.filter(User.id > last_id)
+                .order_by(User.id)
+                .limit(USER_BATCH_SIZE)
+                .all()
+            )
+            if not batch:
+                break
+            total_users += len(batch)
+            last_id = batch[-1].id
+
+            for user in batch:
+                if not user.password_hash:
+                    if default_hash is None:
+                        default_hash = generate_password_hash(default_password)
+                    user.password_hash = default_hash
+                    print(f"   Setting password for {user.email}: {default_password}")
+                if not user.auth_provider:
+                    user.auth_provider = 'local'
+                    print(f"   Setting auth_provider for {user.email}: local")
+
+            db.session.commit()
+
         # Migrate api_credentials table for Capacities fields
         if not inspector.has_table('api_credentials'):
             print("\n📋 Creating api_credentials table...")
             db.create_all()
         else:
-            cred_columns_info = inspector.get_columns('api_credentials')
-            cred_columns = [col['name'] for col in cred_columns_info]
-            print(f"\n📋 api_credentials columns: {cred_columns}")
-            cred_migrations = []
-
-            if 'capacities_space_id' not in cred_columns:
-                cred_migrations.append("ADD COLUMN capacities_space_id VARCHAR(255)")
-
-            if 'capacities_token' not in cred_columns:
-                cred_migrations.append("ADD COLUMN capacities_token TEXT")
-
-            # Ensure Twos columns are nullable
-            for col in cred_columns_info:
-                if col['name'] in ('twos_user_id', 'twos_token') and not col.get('nullable', True):
-                    cred_migrations.append(f"ALTER COLUMN {col['name']} DROP NOT NULL")
-
-            if cred_migrations:
-                print(f"🔧 Applying {len(cred_migrations)} api_credentials migrations...")
-                for migration in cred_migrations:
-                    try:
-                        sql = f"ALTER TABLE api_credentials {migration}"
-                        print(f"   Executing: {sql}")
-                        db.session.execute(text(sql))
-                        db.session.commit()
-                        print("   ✅ Success")
-                    except Exception as e:
-                        print(f"   ⚠️  Warning: {e}")
-                        db.session.rollback()
-            else:
-                print("✅ api_credentials table up to date")
+            # Adds the Capacities columns and relaxes the Twos NOT NULL
+            # constraints, rebuilding the table where the dialect needs it
+            print("\n📋 Checking api_credentials columns...")
+            ensure_capacities_columns(db.engine)
+            print("✅ api_credentials table up to date")
 
         print(f"\n✅ Migration completed successfully!")
-        print(f"📊 Total users: {len(users)}")
+        print(f"📊 Total users: {total_users}")
 
         return True
 
@@ -1,10 +1,14 @@
 """Capacities API client."""
 
 import logging
-from datetime import datetime
+from datetime import date
 from typing import Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import json_utils
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +31,47 @@ class CapacitiesClient:
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json",
         }
+        # Keep-alive session so repeated posts reuse one TLS connection.
+        # Appending to the daily note isn't idempotent, so only failures where
+        # Capacities can't have stored the text are retried: connection
+        # errors before the request is sent and 429 throttling, after the
+        # Retry-After delay
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_maxsize=32,
+                max_retries=Retry(
+                    total=3,
+                    connect=2,
+                    read=0,
+                    other=0,
+                    status_forcelist=[429],
+                    allowed_methods=frozenset(["POST"]),
+                    backoff_factor=0.3,
+                    respect_retry_after_header=True,
+                ),
+            ),
+        )
+
+    def close(self):
+        """Close the underlying HTTP session."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _format_book_meta(book_meta: Dict[str, str]) -> str:
+        """Format the " — title, author" suffix for a book."""
+        meta_parts = [
+            part for part in [book_meta.get("title"), book_meta.get("author")] if part
+        ]
+        return " — " + ", ".join(meta_parts) if meta_parts else ""
 
     def post_highlights(
         self,
@@ -37,31 +82,29 @@ class CapacitiesClient:
     ):
         """Post highlights to today's daily note in Capacities."""
 
-        today_title = datetime.now().strftime("%Y-%m-%d")
-
         if not highlights:
-            md_text = f"No new highlights for {today_title}"
+            md_text = f"No new highlights for {date.today().isoformat()}"
         else:
-            lines = []
-            for highlight in highlights:
-                text = highlight.get("text", "")
-                book_id = highlight.get("book_id")
-                book_meta = books.get(book_id, {})
-                title = book_meta.get("title")
-                author = book_meta.get("author")
-                meta_parts = [part for part in [title, author] if part]
-                meta = " — " + ", ".join(meta_parts) if meta_parts else ""
-                lines.append(f"- {text}{meta}")
-            md_text = "\n".join(lines)
+            # Format each referenced book's suffix once, not once per highlight
+            metas = {
+                book_id: self._format_book_meta(books.get(book_id, {}))
+                for book_id in {highlight.get("book_id") for highlight in highlights}
+            }
+            md_text = "\n".join(
+                f"- {highlight.get('text', '')}{metas[highlight.get('book_id')]}"
+                for highlight in highlights
+            )
 
         payload = {"spaceId": self.space_id, "mdText": md_text}
 
         try:
-            response = requests.post(
-                self.SAVE_DAILY_NOTE_URL, headers=self.headers, json=payload
+            response = self.session.post(
+                self.SAVE_DAILY_NOTE_URL,
+                data=json_utils.dumps(payload),
+                timeout=30,
             )
             response.raise_for_status()
             logger.info("Posted highlights to Capacities daily note")
         except requests.RequestException as e:
-            logger.error(f"Failed to post highlights to Capacities: {e}")
+            logger.error("Failed to post highlights to Capacities: %s", e)
 
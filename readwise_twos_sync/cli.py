@@ -5,9 +5,6 @@ import logging
 import sys
 from pathlib import Path
 
-from .config import Config
-from .sync_manager import SyncManager
-
 
 def setup_logging(verbose: bool = False):
     """Setup logging configuration."""
@@ -19,8 +16,8 @@ def setup_logging(verbose: bool = False):
     )
 
 
-def main():
-    """Main CLI entry point."""
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command line argument parser."""
     parser = argparse.ArgumentParser(
         description="Sync Readwise highlights to Twos and Capacities",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -58,8 +55,20 @@ Examples:
         action="version",
         version="%(prog)s 1.0.0"
     )
+
+    return parser
+
+
+_PARSER = _build_parser()
+
+
+def main():
+    """Main CLI entry point."""
+    args = _PARSER.parse_args()
     
-    args = parser.parse_args()
+    # Imported after argument parsing so --help and --version stay fast
+    from .config import get_config
+    from .sync_manager import SyncManager
     
     # Setup logging
     setup_logging(args.verbose)
@@ -67,7 +76,7 @@ Examples:
     
     try:
         # Initialize configuration
-        config = Config(env_file=args.env_file)
+        config = get_config(args.env_file)
         
         # Run sync
         sync_manager = SyncManager(config)
@@ -76,10 +85,10 @@ Examples:
         logger.info("Sync completed successfully!")
         
     except ValueError as e:
-        logger.error(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Sync failed: {e}")
+        logger.error("Sync failed: %s", e)
         sys.exit(1)
 
 
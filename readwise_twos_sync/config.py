@@ -1,13 +1,67 @@
 """Configuration management for Readwise to Twos/Capacities sync."""
 
 import os
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional
-from dotenv import load_dotenv
+from typing import Dict, FrozenSet, Optional, Tuple
+
+TWOS_VARS = ("TWOS_USER_ID", "TWOS_TOKEN")
+CAPACITIES_VARS = ("CAPACITIES_TOKEN", "CAPACITIES_SPACE_ID")
+
+
+def parse_env_file(path: Path) -> Dict[str, str]:
+    """Parse ``KEY=value`` lines from a .env file.
+
+    Supports blank lines, ``#`` comments, an optional ``export`` prefix,
+    single- or double-quoted values and trailing comments on unquoted values.
+    """
+    values = {}
+    for raw_line in path.read_text(encoding="utf-8").splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("export "):
+            line = line[len("export "):].lstrip()
+
+        key, sep, value = line.partition("=")
+        key = key.strip()
+        if not sep or not key:
+            continue
+
+        value = value.strip()
+        if value[:1] in ("'", '"'):
+            quote = value[0]
+            end = value.find(quote, 1)
+            value = value[1:end] if end != -1 else value[1:]
+            if quote == '"':
+                value = value.replace("\\n", "\n")
+        else:
+            comment = value.find(" #")
+            if comment != -1:
+                value = value[:comment].rstrip()
+
+        values[key] = value
+    return values
+
+
+def load_env_file(path: Path) -> None:
+    """Load a .env file into os.environ without overriding existing values."""
+    for key, value in parse_env_file(path).items():
+        os.environ.setdefault(key, value)
+
+
+@lru_cache(maxsize=None)
+def _load_env_file_once(path: Path) -> None:
+    """Load ``path`` with load_env_file the first time it is seen."""
+    load_env_file(path)
 
 
 class Config:
-    """Configuration class for managing environment variables and settings."""
+    """Configuration class for managing environment variables and settings.
+
+    Settings are read from the environment on first access and cached on the
+    instance, so the environment is snapshotted once per Config.
+    """
 
     def __init__(self, env_file: Optional[str] = None):
         """Initialize configuration.
@@ -18,83 +72,87 @@ class Config:
         if os.getenv("GITHUB_ACTIONS") != "true":
             env_path = Path(env_file) if env_file else Path('.') / '.env'
             if env_path.exists():
-                load_dotenv(dotenv_path=env_path)
+                _load_env_file_once(env_path.resolve())
 
         self._validate_required_vars()
 
-    @property
+    @cached_property
     def readwise_token(self) -> str:
         """Get Readwise API token."""
         return os.environ["READWISE_TOKEN"]
 
-    @property
+    @cached_property
     def twos_user_id(self) -> Optional[str]:
         """Get Twos user ID if provided."""
         return os.environ.get("TWOS_USER_ID")
 
-    @property
+    @cached_property
     def twos_token(self) -> Optional[str]:
         """Get Twos API token if provided."""
         return os.environ.get("TWOS_TOKEN")
 
-    @property
+    @cached_property
     def capacities_token(self) -> Optional[str]:
         """Get Capacities API token if provided."""
         return os.environ.get("CAPACITIES_TOKEN")
 
-    @property
+    @cached_property
     def capacities_space_id(self) -> Optional[str]:
         """Get Capacities space ID if provided."""
         return os.environ.get("CAPACITIES_SPACE_ID")
 
-    @property
+    @cached_property
     def sync_days_back(self) -> int:
         """Number of days to look back for initial sync."""
         return int(os.environ.get("SYNC_DAYS_BACK", "7"))
 
-    @property
+    @cached_property
     def last_sync_file(self) -> Path:
         """Path to last sync timestamp file."""
         return Path(os.environ.get("LAST_SYNC_FILE", "last_sync.json"))
 
     def _validate_required_vars(self):
         """Validate that all required environment variables are set."""
-        if not os.environ.get("READWISE_TOKEN"):
+        env = os.environ
+        if not env.get("READWISE_TOKEN"):
             raise ValueError("Missing required environment variable: READWISE_TOKEN")
 
-        # Collect provided credentials
-        twos_user = os.environ.get("TWOS_USER_ID")
-        twos_token = os.environ.get("TWOS_TOKEN")
-        cap_token = os.environ.get("CAPACITIES_TOKEN")
-        cap_space = os.environ.get("CAPACITIES_SPACE_ID")
-
-        # Validate Twos credentials if either is provided
-        if twos_user or twos_token:
-            missing = []
-            if not twos_user:
-                missing.append("TWOS_USER_ID")
-            if not twos_token:
-                missing.append("TWOS_TOKEN")
-            if missing:
-                raise ValueError(
-                    f"Missing required Twos environment variables: {', '.join(missing)}"
-                )
-
-        # Validate Capacities credentials if either is provided
-        if cap_token or cap_space:
-            missing = []
-            if not cap_token:
-                missing.append("CAPACITIES_TOKEN")
-            if not cap_space:
-                missing.append("CAPACITIES_SPACE_ID")
-            if missing:
-                raise ValueError(
-                    f"Missing required Capacities environment variables: {', '.join(missing)}"
-                )
+        # Collect provided credentials in a single pass over the environment
+        provided = frozenset(
+            name for name in TWOS_VARS + CAPACITIES_VARS if env.get(name)
+        )
+
+        twos_configured = self._check_credential_pair("Twos", TWOS_VARS, provided)
+        capacities_configured = self._check_credential_pair(
+            "Capacities", CAPACITIES_VARS, provided
+        )
 
         # Ensure at least one destination is configured
-        if not ((twos_user and twos_token) or (cap_token and cap_space)):
+        if not (twos_configured or capacities_configured):
             raise ValueError(
                 "Please provide Twos or Capacities credentials to enable syncing"
             )
 
+    @staticmethod
+    def _check_credential_pair(
+        destination: str, names: Tuple[str, ...], provided: FrozenSet[str]
+    ) -> bool:
+        """Return True if all of ``names`` are set, False if none are.
+
+        Raises ValueError when only some of a destination's variables are set.
+        """
+        present = provided.intersection(names)
+        if not present:
+            return False
+        missing = [name for name in names if name not in present]
+        if missing:
+            raise ValueError(
+                f"Missing required {destination} environment variables: {', '.join(missing)}"
+            )
+        return True
+
+
+@lru_cache(maxsize=None)
+def get_config(env_file: Optional[str] = None) -> Config:
+    """Return a shared Config for ``env_file``, loading .env only once."""
+    return Config(env_file=env_file)
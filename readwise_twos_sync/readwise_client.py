@@ -1,16 +1,26 @@
 """Readwise API client."""
 
 import requests
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib3.util.retry import Retry
 import logging
 
+from . import json_utils
+
 logger = logging.getLogger(__name__)
 
+# Normalised titles of Readwise's built-in books that are never synced
+_SKIP_TITLES = frozenset({"how to use readwise"})
+
 
 class ReadwiseClient:
     """Client for interacting with Readwise API."""
     
     BASE_URL = "https://readwise.io/api/v2"
+    PAGE_SIZE = 1000
+    MAX_WORKERS = 8
     
     def __init__(self, token: str):
         """Initialize Readwise client.
@@ -20,6 +30,31 @@ class ReadwiseClient:
         """
         self.token = token
         self.headers = {"Authorization": f"Token {token}"}
+        # Keep-alive session sized for the concurrent page fetches
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=self.MAX_WORKERS,
+                pool_maxsize=self.MAX_WORKERS,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.3,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                ),
+            ),
+        )
+    
+    def close(self):
+        """Close the underlying HTTP session."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
     
     def fetch_all_books(self) -> Dict[int, Dict[str, str]]:
         """Fetch all books from Readwise.
@@ -28,35 +63,26 @@ class ReadwiseClient:
             Dictionary mapping book IDs to book metadata
         """
         books = {}
-        next_url = f"{self.BASE_URL}/books/"
         
-        while next_url:
-            try:
-                response = requests.get(next_url, headers=self.headers)
-                response.raise_for_status()
-                data = response.json()
+        try:
+            for book in self._iter_results(f"{self.BASE_URL}/books/"):
+                book_id = book.get("id")
+                title = book.get("title", "Untitled")
+                author = book.get("author", "Unknown")
                 
-                for book in data.get("results", []):
-                    book_id = book.get("id")
-                    title = book.get("title", "Untitled")
-                    author = book.get("author", "Unknown")
-                    
-                    # Skip Readwise tutorial book
-                    if title.strip().lower() == "how to use readwise":
-                        continue
-                    
-                    books[book_id] = {
-                        "title": title,
-                        "author": author
-                    }
+                # Skip Readwise tutorial book
+                if title.strip().lower() in _SKIP_TITLES:
+                    continue
                 
-                next_url = data.get("next")
-                
-            except requests.RequestException as e:
-                logger.error(f"Error fetching books: {e}")
-                raise
+                books[book_id] = {
+                    "title": title,
+                    "author": author
+                }
+        except requests.RequestException as e:
+            logger.error("Error fetching books: %s", e)
+            raise
         
-        logger.info(f"Fetched {len(books)} books from Readwise")
+        logger.info("Fetched %d books from Readwise", len(books))
         return books
     
     def fetch_highlights_since(self, since: str) -> List[Dict]:
@@ -68,26 +94,105 @@ class ReadwiseClient:
         Returns:
             List of highlight dictionaries
         """
+        try:
+            # Let Readwise filter by update time so only new highlights are sent
+            highlights = list(self._iter_results(
+                f"{self.BASE_URL}/highlights/", {"updated__gt": since}
+            ))
+        except requests.RequestException as e:
+            logger.error("Error fetching highlights: %s", e)
+            raise
+        
+        logger.info("Fetched %d new highlights since %s", len(highlights), since)
+        return highlights
+    
+    def fetch_export_since(self, since: str) -> Tuple[List[Dict], Dict[int, Dict[str, str]]]:
+        """Fetch new highlights and their books in one pass via the export API.
+        
+        Args:
+            since: ISO timestamp string
+            
+        Returns:
+            Tuple of (highlights, books) in the same shapes as
+            ``fetch_highlights_since`` and ``fetch_all_books``
+        """
         highlights = []
-        next_url = f"{self.BASE_URL}/highlights/"
-        params = {"page_size": 1000}
+        books = {}
+        params = {"updatedAfter": since}
         
-        while next_url:
-            try:
-                response = requests.get(next_url, headers=self.headers, params=params)
-                response.raise_for_status()
-                data = response.json()
+        try:
+            while True:
+                data = self._get_page(f"{self.BASE_URL}/export/", params)
                 
-                for highlight in data.get("results", []):
-                    if highlight.get("updated") and highlight["updated"] > since:
-                        highlights.append(highlight)
+                for book in data.get("results", []):
+                    title = book.get("title") or "Untitled"
+                    # Skip Readwise tutorial book
+                    if title.strip().lower() not in _SKIP_TITLES:
+                        books[book.get("user_book_id")] = {
+                            "title": title,
+                            "author": book.get("author") or "Unknown"
+                        }
+                    # Deleting a highlight counts as an update, so skip those
+                    highlights.extend(
+                        highlight for highlight in book.get("highlights", [])
+                        if not highlight.get("is_deleted")
+                    )
                 
+                cursor = data.get("nextPageCursor")
+                if not cursor:
+                    break
+                params = {"updatedAfter": since, "pageCursor": cursor}
+        except requests.RequestException as e:
+            logger.error("Error fetching export: %s", e)
+            raise
+        
+        logger.info(
+            "Fetched %d new highlights from %d books since %s",
+            len(highlights), len(books), since
+        )
+        return highlights, books
+    
+    def _get_page(self, url: str, params: Optional[Dict] = None) -> Dict:
+        """Fetch a single page of a Readwise list endpoint."""
+        response = self.session.get(url, params=params)
+        response.raise_for_status()
+        return json_utils.loads(response.content)
+    
+    def _iter_results(self, url: str, filters: Optional[Dict] = None) -> Iterator[Dict]:
+        """Yield every result of a paginated Readwise list endpoint.
+        
+        The first page reports the total count, so the remaining pages are
+        fetched concurrently and yielded in page order. If the count is
+        missing, the ``next`` links are followed one by one instead.
+        
+        Args:
+            url: List endpoint URL
+            filters: Extra query parameters sent with every page request
+        """
+        base_params = {**(filters or {}), "page_size": self.PAGE_SIZE}
+        first_page = self._get_page(url, base_params)
+        yield from first_page.get("results", [])
+        
+        if not first_page.get("next"):
+            return
+        
+        count = first_page.get("count")
+        if count is None:
+            next_url = first_page.get("next")
+            while next_url:
+                data = self._get_page(next_url)
+                yield from data.get("results", [])
                 next_url = data.get("next")
-                params = {}  # Only use params on first request
-                
-            except requests.RequestException as e:
-                logger.error(f"Error fetching highlights: {e}")
-                raise
+            return
         
-        logger.info(f"Fetched {len(highlights)} new highlights since {since}")
-        return highlights
\ No newline at end of file
+        total_pages = -(-count // self.PAGE_SIZE)
+        if total_pages < 2:
+            return
+        workers = min(self.MAX_WORKERS, total_pages - 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pages = executor.map(
+                lambda page: self._get_page(url, {**base_params, "page": page}),
+                range(2, total_pages + 1),
+            )
+            for data in pages:
+                yield from data.get("results", [])
@@ -1,15 +1,18 @@
 """Sync manager for coordinating the sync process."""
 
-import json
-from datetime import datetime, timedelta
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 import logging
 
-from .config import Config
+from . import json_utils
+from .capacities_client import CapacitiesClient
+from .config import Config, get_config
 from .readwise_client import ReadwiseClient
 from .twos_client import TwosClient
-from .capacities_client import CapacitiesClient
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +24,13 @@ class SyncManager:
         """Initialize sync manager.
 
         Args:
-            config: Configuration object. If None, creates a new one.
+            config: Configuration object. If None, uses the shared one.
         """
-        self.config = config or Config()
+        self.config = config or get_config()
         self.readwise_client = ReadwiseClient(self.config.readwise_token)
+        # Last sync timestamp, read from the sync file on first use
+        self._last_sync: Optional[str] = None
+        # Destination clients are only built when they are configured
         self.twos_client: Optional[TwosClient] = None
         if self.config.twos_user_id and self.config.twos_token:
             self.twos_client = TwosClient(
@@ -42,46 +48,56 @@ class SyncManager:
 
         try:
             last_sync = self._get_last_sync_time()
-            logger.info(f"Last sync: {last_sync}")
-
-            highlights = self.readwise_client.fetch_highlights_since(last_sync)
+            logger.info("Last sync: %s", last_sync)
 
             if not self.twos_client and not self.capacities_client:
                 raise ValueError("No sync destinations configured")
 
+            # The export endpoint returns new highlights with their books inline
+            highlights, books = self.readwise_client.fetch_export_since(last_sync)
+
             if highlights:
-                books = self.readwise_client.fetch_all_books()
-                if self.twos_client:
-                    self.twos_client.post_highlights(highlights, books)
-                if self.capacities_client:
-                    self.capacities_client.post_highlights(highlights, books)
+                self._post_to_destinations(highlights, books)
             else:
                 logger.info("No new highlights found")
-                if self.twos_client:
-                    self.twos_client.post_highlights([], {})
-                if self.capacities_client:
-                    self.capacities_client.post_highlights([], {})
+                self._post_to_destinations([], {})
 
-            self._save_last_sync_time(datetime.utcnow().isoformat())
+            self._save_last_sync_time(datetime.now(timezone.utc).isoformat())
             logger.info("Sync completed successfully")
 
         except Exception as e:
-            logger.error(f"Sync failed: {e}")
+            logger.error("Sync failed: %s", e)
             raise
 
+    def _post_to_destinations(self, highlights: List[Dict], books: Dict[int, Dict[str, str]]):
+        """Post highlights to all configured destinations concurrently."""
+        clients = [
+            client for client in (self.twos_client, self.capacities_client) if client
+        ]
+        with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+            futures = [
+                executor.submit(client.post_highlights, highlights, books)
+                for client in clients
+            ]
+            for future in futures:
+                future.result()
+
     def _get_last_sync_time(self) -> str:
         """Get the last sync timestamp."""
-        sync_file = self.config.last_sync_file
+        if self._last_sync is not None:
+            return self._last_sync
 
-        if sync_file.exists():
-            try:
-                with open(sync_file, "r") as f:
-                    data = json.load(f)
-                    return data["last_sync"]
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.warning(f"Invalid sync file format: {e}")
+        sync_file = self.config.last_sync_file
 
-        default_time = datetime.utcnow() - timedelta(days=self.config.sync_days_back)
+        try:
+            self._last_sync = json_utils.loads(sync_file.read_bytes())["last_sync"]
+            return self._last_sync
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Invalid sync file format: %s", e)
+
+        default_time = datetime.now(timezone.utc) - timedelta(days=self.config.sync_days_back)
         return default_time.isoformat()
 
     def _save_last_sync_time(self, timestamp: str):
@@ -89,10 +105,21 @@ class SyncManager:
         sync_file = self.config.last_sync_file
 
         try:
-            with open(sync_file, "w") as f:
-                json.dump({"last_sync": timestamp}, f, indent=2)
-            logger.debug(f"Saved last sync time: {timestamp}")
+            # Write to a sibling temp file and swap it in so a crashed or
+            # concurrent run never leaves a truncated sync file behind.
+            fd, tmp_path = tempfile.mkstemp(
+                dir=sync_file.parent, prefix=f".{sync_file.name}.", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(json_utils.dumps({"last_sync": timestamp}))
+                os.replace(tmp_path, sync_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._last_sync = timestamp
+            logger.debug("Saved last sync time: %s", timestamp)
         except IOError as e:
-            logger.error(f"Failed to save sync time: {e}")
+            logger.error("Failed to save sync time: %s", e)
             raise
 
@@ -1,17 +1,25 @@
 """Twos API client."""
 
 import requests
-from typing import List, Dict
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional
+from urllib3.util.retry import Retry
 import logging
+import time
+
+from . import json_utils
 
 logger = logging.getLogger(__name__)
 
+# strftime format of the Twos daily list title, e.g. "Mon Jan 01, 2024"
+TITLE_FORMAT = "%a %b %d, %Y"
+
 
 class TwosClient:
     """Client for interacting with Twos API."""
     
     API_URL = "https://www.twosapp.com/apiV2/user/addToToday"
+    BATCH_SIZE = 50
     
     def __init__(self, user_id: str, token: str):
         """Initialize Twos client.
@@ -23,55 +31,120 @@ class TwosClient:
         self.user_id = user_id
         self.token = token
         self.headers = {"Content-Type": "application/json"}
+        # Keep-alive session so batch posts reuse one TLS connection. Posts
+        # aren't idempotent, so only failures where Twos can't have stored the
+        # note are retried: connection errors before the request is sent and
+        # 429 throttling, after the Retry-After delay
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                max_retries=Retry(
+                    total=3,
+                    connect=2,
+                    read=0,
+                    other=0,
+                    status_forcelist=[429],
+                    allowed_methods=frozenset(["POST"]),
+                    backoff_factor=0.3,
+                    respect_retry_after_header=True,
+                ),
+            ),
+        )
+    
+    def close(self):
+        """Close the underlying HTTP session."""
+        self.session.close()
     
-    def post_highlights(self, highlights: List[Dict], books: Dict[int, Dict[str, str]]):
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def post_highlights(
+        self,
+        highlights: List[Dict],
+        books: Dict[int, Dict[str, str]],
+        today_title: Optional[str] = None,
+    ):
         """Post highlights to Twos.
         
         Args:
             highlights: List of highlight dictionaries from Readwise
             books: Dictionary mapping book IDs to book metadata
+            today_title: Title of the day's list. Defaults to today's date.
         """
-        today_title = datetime.now().strftime("%a %b %d, %Y")
+        if today_title is None:
+            today_title = time.strftime(TITLE_FORMAT)
         
         if not highlights:
             self._post_no_highlights_message(today_title)
             return
         
-        successful_posts = 0
-        failed_posts = 0
-        
+        base_payload = {
+            "title": today_title,
+            "token": self.token,
+            "user_id": self.user_id
+        }
+        books_get = books.get
+        notes = []
         for highlight in highlights:
-            try:
-                book_id = highlight.get("book_id")
-                text = highlight.get("text")
-                book_meta = books.get(book_id)
-                
-                if not book_meta:
-                    logger.warning(f"No book metadata found for book ID {book_id}")
-                    continue
-                
-                title = book_meta["title"]
-                author = book_meta["author"]
-                note_text = f"{title}, {author}: {text}"
-                
-                payload = {
-                    "text": note_text.strip(),
-                    "title": today_title,
-                    "token": self.token,
-                    "user_id": self.user_id
-                }
-                
-                response = requests.post(self.API_URL, headers=self.headers, json=payload)
-                response.raise_for_status()
-                successful_posts += 1
-                
-            except requests.RequestException as e:
-                logger.error(f"Failed to post highlight to Twos: {e}")
-                failed_posts += 1
+            book_id = highlight.get("book_id")
+            book_meta = books_get(book_id)
+            
+            if not book_meta:
+                logger.warning("No book metadata found for book ID %s", book_id)
+                continue
+            
+            note_text = f"{book_meta['title']}, {book_meta['author']}: {highlight.get('text')}"
+            notes.append(note_text.strip())
         
-        logger.info(f"Posted {successful_posts} highlights to Twos")
+        # Batches are posted one after another: Twos appends entries in
+        # arrival order, so overlapping them would scramble the user's list
+        successful_posts = 0
+        for start in range(0, len(notes), self.BATCH_SIZE):
+            batch = notes[start:start + self.BATCH_SIZE]
+            body = json_utils.dumps({"text": "\n".join(batch), **base_payload})
+            successful_posts += self._post_batch(body, batch, base_payload)
+        failed_posts = len(notes) - successful_posts
+        
+        logger.info("Posted %d highlights to Twos", successful_posts)
         if failed_posts > 0:
-            logger.warning(f"Failed to post {failed_posts} highlights")
+            logger.warning("Failed to post %d highlights", failed_posts)
+    
+    def _post_batch(self, body: bytes, notes: List[str], base_payload: Dict) -> int:
+        """Post a pre-encoded batch of notes, returning how many were posted.
+        
+        If Twos rejects the combined entry as malformed or too large, the
+        notes are retried one at a time.
+        """
+        try:
+            response = self.session.post(self.API_URL, data=body)
+            response.raise_for_status()
+            return len(notes)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if len(notes) > 1 and status in (400, 413):
+                logger.info("Twos rejected a batch of %d notes; posting individually", len(notes))
+                return sum(
+                    self._post_one({"text": note, **base_payload}) for note in notes
+                )
+            logger.error("Failed to post highlights to Twos: %s", e)
+        except requests.RequestException as e:
+            logger.error("Failed to post highlights to Twos: %s", e)
+        return 0
+    
+    def _post_one(self, payload: Dict) -> bool:
+        """Post a single note to Twos, returning True on success."""
+        try:
+            response = self.session.post(self.API_URL, data=json_utils.dumps(payload))
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            logger.error("Failed to post highlight to Twos: %s", e)
+            return False
     
     def _post_no_highlights_message(self, today_title: str):
         """Post a message when no new highlights are found."""
@@ -83,8 +156,8 @@ class TwosClient:
         }
         
         try:
-            response = requests.post(self.API_URL, headers=self.headers, json=payload)
+            response = self.session.post(self.API_URL, data=json_utils.dumps(payload))
             response.raise_for_status()
             logger.info("Posted 'no highlights' message to Twos")
         except requests.RequestException as e:
-            logger.error(f"Failed to post no-highlights message to Twos: {e}")
\ No newline at end of file
+            logger.error("Failed to post no-highlights message to Twos: %s", e)
\ No newline at end of file
@@ -3,6 +3,7 @@
 Test runner script for the Readwise-Twos sync application
 """
 
+import importlib.util
 import sys
 import subprocess
 import os
@@ -40,6 +41,11 @@ def run_tests():
     except ImportError:
         print("Running tests without coverage (install pytest-cov for coverage reports)...")
     
+    # Spread test files across CPU cores if pytest-xdist is available; each
+    # worker gets its own in-memory database from conftest
+    if importlib.util.find_spec('xdist') is not None:
+        cmd.extend(['-n', 'auto', '--dist=loadfile'])
+    
     # Run the tests
     try:
         result = subprocess.run(cmd, check=False)
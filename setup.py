@@ -32,7 +32,7 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "requests>=2.25.0",
-        "python-dotenv>=0.19.0",
+        "orjson>=3.9",
     ],
     extras_require={
         "dev": [
@@ -5,19 +5,21 @@ Complete authentication setup script
 
 import os
 import sys
-import subprocess
-from werkzeug.security import generate_password_hash
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 # Add backend to path
-sys.path.append('backend')
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from env_utils import ensure_env
+
+# Load environment variables
+ensure_env()
 
 def setup_database():
     """Setup database and ensure user exists"""
     from app import app, db, User
+    from werkzeug.security import generate_password_hash
     
     with app.app_context():
         print("🗄️  Setting up database...")
@@ -27,14 +29,20 @@ def setup_database():
         print("✅ Database tables created")
         
         # Check for existing user
-        existing_user = User.query.filter_by(email="jkuhns13@gmail.com").first()
+        existing_user = (
+            db.session.query(User.id, User.email)
+            .filter_by(email="jkuhns13@gmail.com")
+            .first()
+        )
         
         if existing_user:
             print(f"✅ Found existing user: {existing_user.email}")
             
             # Reset password to known value
             new_password = "481816Test!"
-            existing_user.password_hash = generate_password_hash(new_password)
+            User.query.filter_by(id=existing_user.id).update(
+                {'password_hash': generate_password_hash(new_password)}
+            )
             db.session.commit()
             
             print(f"🔑 Password reset to: {new_password}")
@@ -45,14 +53,16 @@ def setup_database():
             password = "481816Test!"
             name = "Jordan Kuhns"
             
-            user = User(
-                email=email,
-                name=name,
-                password_hash=generate_password_hash(password),
-                auth_provider='local'
-            )
+            from sqlalchemy import insert
             
-            db.session.add(user)
+            db.session.execute(
+                insert(User).values(
+                    email=email,
+                    name=name,
+                    password_hash=generate_password_hash(password),
+                    auth_provider='local'
+                )
+            )
             db.session.commit()
             
             print(f"✅ Created new user: {email}")
@@ -5,19 +5,63 @@ Start the application with proper database setup
 
 import os
 import sys
-from dotenv import load_dotenv
+
+# Add backend to path
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from env_utils import ensure_env
 
 # Load environment variables
-load_dotenv()
+ensure_env()
 
-# Add backend to path
-sys.path.append('backend')
+def serve_production(app, host, port):
+    """Serve the app with gunicorn, falling back to the threaded dev server"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("⚠️  gunicorn not installed, using the Flask server")
+        app.run(host=host, port=port, threaded=True)
+        return
+
+    from app import db, scheduler
+
+    # The app module was imported, and its scheduler started, here in the
+    # gunicorn master. Threads don't survive fork, so stop the scheduler
+    # before forking and run it in the worker instead
+    run_scheduler = scheduler.running
+    if run_scheduler:
+        scheduler.shutdown(wait=False)
+
+    def post_fork(server, worker):
+        # Drop the pooled connections inherited from the master without
+        # closing the master's sockets
+        with app.app_context():
+            db.engine.dispose(close=False)
+        if run_scheduler:
+            scheduler.start()
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            # A single worker owns the one APScheduler instance; threads
+            # give request concurrency
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', 1)
+            self.cfg.set('threads', int(os.environ.get('WEB_THREADS', 8)))
+            self.cfg.set('post_fork', post_fork)
+
+        def load(self):
+            return app
+
+    print("🦄 Serving with gunicorn")
+    StandaloneApplication().run()
 
 def setup_and_start():
     """Setup database and start the application"""
     from app import app, db, User
     from werkzeug.security import generate_password_hash
-    from sqlalchemy import text, inspect
+    from sqlalchemy import inspect
     
     with app.app_context():
         print("🚀 Starting Readwise Twos Sync Application")
@@ -30,8 +74,8 @@ def setup_and_start():
         try:
             inspector = inspect(db.engine)
             if inspector.has_table('users'):
-                columns = [col['name'] for col in inspector.get_columns('users')]
-                print(f"🔍 Current database columns: {columns}")
+                columns = frozenset(col['name'] for col in inspector.get_columns('users'))
+                print(f"🔍 Current database columns: {sorted(columns)}")
                 
                 # List of columns to add with their SQL
                 migrations = [
@@ -45,18 +89,45 @@ def setup_and_start():
                     ("updated_at", "ALTER TABLE users ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
                 ]
                 
+                missing = [(name, sql) for name, sql in migrations if name not in columns]
                 migrations_applied = 0
-                for column_name, sql in migrations:
-                    if column_name not in columns:
-                        try:
-                            print(f"🔄 Adding column: {column_name}")
-                            db.session.execute(text(sql))
-                            db.session.commit()
-                            migrations_applied += 1
-                            print(f"✅ Added column: {column_name}")
-                        except Exception as e:
-                            print(f"⚠️  Failed to add {column_name}: {e}")
-                            db.session.rollback()
+                
+                if missing:
+                    print(f"🔄 Adding columns: {', '.join(name for name, _ in missing)}")
+                    try:
+                        # One transaction, so the whole sweep commits once;
+                        # each ALTER runs in its own SAVEPOINT so a failure
+                        # only discards that column
+                        with db.engine.begin() as conn:
+                            pending = missing
+                            if db.engine.dialect.name != 'sqlite':
+                                # PostgreSQL/MySQL take every ADD COLUMN in one ALTER TABLE
+                                prefix = "ALTER TABLE users "
+                                savepoint = conn.begin_nested()
+                                try:
+                                    conn.exec_driver_sql(
+                                        prefix + ", ".join(sql[len(prefix):] for _, sql in missing)
+                                    )
+                                    savepoint.commit()
+                                    migrations_applied = len(missing)
+                                    pending = []
+                                except Exception as e:
+                                    savepoint.rollback()
+                                    print(f"⚠️  Batched ALTER failed, retrying per column: {e}")
+                            
+                            # SQLite only accepts one ADD COLUMN per statement
+                            for name, sql in pending:
+                                savepoint = conn.begin_nested()
+                                try:
+                                    conn.exec_driver_sql(sql)
+                                    savepoint.commit()
+                                    migrations_applied += 1
+                                except Exception as e:
+                                    savepoint.rollback()
+                                    print(f"⚠️  Failed to add {name}: {e}")
+                    except Exception as e:
+                        print(f"⚠️  Failed to add columns: {e}")
+                        migrations_applied = 0
                 
                 if migrations_applied > 0:
                     print(f"✅ Applied {migrations_applied} database migrations")
@@ -69,8 +140,13 @@ def setup_and_start():
             import traceback
             traceback.print_exc()
         
-        # Create all tables (safe to run multiple times)
-        db.create_all()
+        # Create any missing tables; skip the per-table checks when every
+        # model table already exists (importing the app creates them)
+        missing_tables = set(db.metadata.tables) - set(inspect(db.engine).get_table_names())
+        if missing_tables:
+            db.create_all()
+        else:
+            print("✅ Schema current, skipping create_all")
         print("✅ Database setup complete")
         
         # Show database info
@@ -86,25 +162,35 @@ def setup_and_start():
         admin_password = "481816Test!"
         
         try:
-            existing_user = User.query.filter_by(email=admin_email).first()
+            # Only the columns the checks below need, not a full User row
+            existing_user = (
+                db.session.query(User.id, User.password_hash, User.auth_provider)
+                .filter_by(email=admin_email)
+                .first()
+            )
             
             if not existing_user:
                 print("Creating admin user...")
-                admin_user = User(
-                    email=admin_email,
-                    name="Jordan Kuhns",
-                    password_hash=generate_password_hash(admin_password),
-                    auth_provider='local'
-                )
-                db.session.add(admin_user)
+                from sqlalchemy import insert
+                
+                admin_id = db.session.execute(
+                    insert(User).values(
+                        email=admin_email,
+                        name="Jordan Kuhns",
+                        password_hash=generate_password_hash(admin_password),
+                        auth_provider='local'
+                    ).returning(User.id)
+                ).scalar_one()
                 db.session.commit()
-                print(f"✅ Admin user created: {admin_email}")
+                print(f"✅ Admin user created: {admin_email} (id {admin_id})")
             else:
                 # Ensure existing user has password_hash set
                 if not existing_user.password_hash:
                     print("Setting password for existing admin user...")
-                    existing_user.password_hash = generate_password_hash(admin_password)
-                    existing_user.auth_provider = existing_user.auth_provider or 'local'
+                    User.query.filter_by(id=existing_user.id).update({
+                        'password_hash': generate_password_hash(admin_password),
+                        'auth_provider': existing_user.auth_provider or 'local'
+                    })
                     db.session.commit()
                     print(f"✅ Password set for existing user: {admin_email}")
                 else:
@@ -113,25 +199,31 @@ def setup_and_start():
             print(f"⚠️  User setup warning: {e}")
             # Continue anyway
         
-        print(f"🌐 Frontend URL: {os.environ.get('FRONTEND_URL', 'Not set')}")
-        print(f"🔑 JWT Secret: {'Set' if os.environ.get('JWT_SECRET_KEY') else 'Not set'}")
-        
         # Start the application
         port = int(os.environ.get('PORT', 5000))
         host = '0.0.0.0' if is_production else '127.0.0.1'
         debug_mode = not is_production
         
-        print(f"\n🎯 Starting server on {host}:{port}")
-        print(f"🔧 Debug mode: {debug_mode}")
-        print("📋 Available routes:")
-        print("   - / : Main application")
-        print("   - /admin : Admin console")
-        print("   - /api/auth/login : Login endpoint")
-        print("   - /api/auth/register : Registration endpoint")
-        print("   - /debug/users : Debug user list")
-        print("\n" + "="*50)
+        # Build the startup banner and write it in one go
+        msgs = [
+            f"🌐 Frontend URL: {os.environ.get('FRONTEND_URL', 'Not set')}",
+            f"🔑 JWT Secret: {'Set' if os.environ.get('JWT_SECRET_KEY') else 'Not set'}",
+            f"\n🎯 Starting server on {host}:{port}",
+            f"🔧 Debug mode: {debug_mode}",
+            "📋 Available routes:",
+            "   - / : Main application",
+            "   - /admin : Admin console",
+            "   - /api/auth/login : Login endpoint",
+            "   - /api/auth/register : Registration endpoint",
+            "   - /debug/users : Debug user list",
+            "\n" + "="*50,
+        ]
+        print("\n".join(msgs), flush=True)
         
-        app.run(host=host, port=port, debug=debug_mode)
+        if is_production:
+            serve_production(app, host, port)
+        else:
+            app.run(host=host, port=port, debug=debug_mode)
 
 if __name__ == "__main__":
     setup_and_start()
\ No newline at end of file
@@ -5,15 +5,23 @@ Test authentication functionality
 
 import os
 import sys
-import requests
 import json
-from dotenv import load_dotenv
+
+# Add backend to path
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from env_utils import ensure_env
 
 # Load environment variables
-load_dotenv()
+ensure_env()
 
-# Add backend to path
-sys.path.append('backend')
+# Login request body, encoded once
+_LOGIN_BODY = json.dumps({
+    "email": "jkuhns13@gmail.com",
+    "password": "481816Test!"
+}).encode()
 
 def test_login():
     """Test login functionality"""
@@ -25,14 +33,9 @@ def test_login():
         print("=" * 50)
         
         # Test login
-        login_data = {
-            "email": "jkuhns13@gmail.com",
-            "password": "481816Test!"
-        }
-        
         print("Testing login...")
         response = client.post('/api/auth/login', 
-                             json=login_data,
+                             data=_LOGIN_BODY,
                              content_type='application/json')
         
         print(f"Login response status: {response.status_code}")
@@ -3,9 +3,19 @@
 Test authentication endpoints to ensure they're working
 """
 
+import os
 import requests
 import json
+import signal
+import subprocess
 import sys
+import time
+from requests.adapters import HTTPAdapter
+
+# One keep-alive connection reused for every check
+SESSION = requests.Session()
+SESSION.headers.update({"Content-Type": "application/json"})
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
 
 def test_auth_endpoints():
     """Test authentication endpoints"""
@@ -16,7 +26,7 @@ def test_auth_endpoints():
     
     # Test 1: Health check
     try:
-        response = requests.get(f"{base_url}/health")
+        response = SESSION.get(f"{base_url}/health")
         print(f"✅ Health check: {response.status_code}")
     except Exception as e:
         print(f"❌ Health check failed: {e}")
@@ -30,10 +40,9 @@ def test_auth_endpoints():
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{base_url}/api/auth/register",
-            json=test_user,
-            headers={"Content-Type": "application/json"}
+            json=test_user
         )
         print(f"✅ Registration test: {response.status_code}")
         if response.status_code == 201:
@@ -51,10 +60,9 @@ def test_auth_endpoints():
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{base_url}/api/auth/login",
-            json=login_data,
-            headers={"Content-Type": "application/json"}
+            json=login_data
         )
         print(f"✅ Login test: {response.status_code}")
         if response.status_code == 200:
@@ -71,7 +79,7 @@ def test_auth_endpoints():
     
     # Test 4: Admin endpoints
     try:
-        response = requests.get(
+        response = SESSION.get(
             f"{base_url}/api/admin/users",
             headers={"Authorization": "Bearer admin-access"}
         )
@@ -84,15 +92,48 @@ def test_auth_endpoints():
     
     return True
 
+def wait_for_app(base_url, timeout=10):
+    """Poll the health endpoint until the app answers or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while time.monotonic() < deadline:
+        try:
+            SESSION.get(f"{base_url}/health", timeout=1)
+            return True
+        except requests.RequestException:
+            time.sleep(delay)
+            delay = min(delay * 2, 1)
+    return False
+
 def main():
     """Main function"""
     print("Starting authentication tests...")
-    print("Make sure your Flask app is running on http://127.0.0.1:5000")
-    print()
     
-    input("Press Enter when your app is running...")
+    base_url = "http://127.0.0.1:5000"
+    proc = None
+    if not wait_for_app(base_url, timeout=0.5):
+        # Nothing listening yet; start the app ourselves. In dev mode it runs
+        # under the Werkzeug reloader, so give it its own process group to
+        # stop the reloader child along with it.
+        print("Launching start_app.py (this also creates the admin user if it is missing)...")
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        proc = subprocess.Popen(
+            [sys.executable, 'start_app.py'], cwd=app_dir, start_new_session=True
+        )
     
-    test_auth_endpoints()
+    try:
+        if not wait_for_app(base_url):
+            print(f"❌ App did not become ready at {base_url}")
+            return False
+        return test_auth_endpoints()
+    finally:
+        if proc is not None:
+            os.killpg(proc.pid, signal.SIGTERM)
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
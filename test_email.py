@@ -6,22 +6,67 @@ Test email sending functionality
 import os
 import sys
 import smtplib
+from contextlib import contextmanager
+from types import SimpleNamespace
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from dotenv import load_dotenv
+
+# Add backend to path
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from env_utils import ensure_env
 
 # Load environment variables
-load_dotenv()
+ensure_env()
+
+def parse_smtp_port(value):
+    """Parse SMTP_PORT, exiting with a clear message if it isn't an integer"""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        sys.exit(f"❌ SMTP_PORT must be an integer, got {value!r}")
+
+# SMTP settings, read once; the port is parsed to an int up front
+SMTP = SimpleNamespace(
+    server=os.environ.get('SMTP_SERVER'),
+    port=parse_smtp_port(os.environ.get('SMTP_PORT')),
+    username=os.environ.get('SMTP_USERNAME'),
+    password=os.environ.get('SMTP_PASSWORD'),
+    from_email=os.environ.get('FROM_EMAIL'),
+)
+
+@contextmanager
+def smtp_session(smtp_server, smtp_port, smtp_username, smtp_password):
+    """Yield one authenticated SMTP connection for any number of sends"""
+    if smtp_port == 465:
+        # Use SSL for port 465
+        print("Using SSL connection...")
+        server = smtplib.SMTP_SSL(smtp_server, smtp_port)
+    else:
+        server = smtplib.SMTP(smtp_server, smtp_port)
+    
+    with server:
+        if smtp_port != 465:
+            # Use STARTTLS for port 587
+            print("Starting TLS...")
+            server.starttls()
+        print("Logging in...")
+        server.login(smtp_username, smtp_password)
+        yield server
 
 def test_email_config():
     """Test email configuration and sending"""
     
     # Get email configuration
-    smtp_server = os.environ.get('SMTP_SERVER')
-    smtp_port = os.environ.get('SMTP_PORT')
-    smtp_username = os.environ.get('SMTP_USERNAME')
-    smtp_password = os.environ.get('SMTP_PASSWORD')
-    from_email = os.environ.get('FROM_EMAIL')
+    smtp_server = SMTP.server
+    smtp_port = SMTP.port
+    smtp_username = SMTP.username
+    smtp_password = SMTP.password
+    from_email = SMTP.from_email
     
     print("=== Email Configuration ===")
     print(f"SMTP_SERVER: {smtp_server}")
@@ -53,7 +98,7 @@ def test_email_config():
         print("=== Testing Email Connection ===")
         
         # Get test recipient
-        to_email = input("Enter email address to send test email to: ")
+        to_email = os.environ.get('TEST_RECIPIENT') or input("Enter email address to send test email to: ")
         
         # Create test message
         msg = MIMEMultipart()
@@ -66,23 +111,9 @@ def test_email_config():
         
         # Send email
         print(f"Connecting to {smtp_server}:{smtp_port}...")
-        if int(smtp_port) == 465:
-            # Use SSL for port 465
-            print("Using SSL connection...")
-            with smtplib.SMTP_SSL(smtp_server, int(smtp_port)) as server:
-                print("Logging in...")
-                server.login(smtp_username, smtp_password)
-                print("Sending email...")
-                server.send_message(msg)
-        else:
-            # Use STARTTLS for port 587
-            with smtplib.SMTP(smtp_server, int(smtp_port)) as server:
-                print("Starting TLS...")
-                server.starttls()
-                print("Logging in...")
-                server.login(smtp_username, smtp_password)
-                print("Sending email...")
-                server.send_message(msg)
+        with smtp_session(smtp_server, smtp_port, smtp_username, smtp_password) as server:
+            print("Sending email...")
+            server.send_message(msg)
         
         print("✅ Test email sent successfully!")
         return True
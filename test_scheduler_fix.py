@@ -3,16 +3,19 @@
 Test script to verify the scheduler timezone fix
 """
 
-import pytz
-from datetime import datetime
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 from apscheduler.schedulers.background import BackgroundScheduler
-import time
+
+CHICAGO_TZ = ZoneInfo('America/Chicago')
+UTC_TZ = timezone.utc
 
 def simulate_sync_job(user_id):
     """Simulate a sync job"""
-    now = datetime.now()
-    now_utc = datetime.now(pytz.UTC)
-    now_chicago = now_utc.astimezone(pytz.timezone('America/Chicago'))
+    # Read the clock once and derive the other zones from it
+    now_utc = datetime.now(UTC_TZ)
+    now_chicago = now_utc.astimezone(CHICAGO_TZ)
+    now = now_utc.astimezone()
     
     print(f"Sync job for user {user_id} executed at:")
     print(f"  System local: {now}")
@@ -24,25 +27,12 @@ def schedule_sync_job_with_timezone(user_id, sync_time, scheduler):
     # Parse sync time (format: "HH:MM")
     hour, minute = map(int, sync_time.split(':'))
     
-    # Get the system's local timezone - detect automatically
-    try:
-        # Try to get system timezone
-        import time
-        local_tz_name = time.tzname[time.daylight]
-        if local_tz_name in ['CDT', 'CST']:
-            local_tz = pytz.timezone('America/Chicago')
-        else:
-            # Fallback to system timezone
-            local_tz = pytz.timezone('America/Chicago')  # Default for this deployment
-    except:
-        # Fallback to Chicago timezone
-        local_tz = pytz.timezone('America/Chicago')
+    # Sync times are wall-clock times in the deployment's timezone
+    local_tz = CHICAGO_TZ
     
     # Remove existing job if it exists
-    try:
+    if scheduler.get_job(f"sync_user_{user_id}") is not None:
         scheduler.remove_job(f"sync_user_{user_id}")
-    except:
-        pass
     
     # Schedule new job with timezone (FIXED VERSION)
     scheduler.add_job(
@@ -63,10 +53,8 @@ def schedule_sync_job_without_timezone(user_id, sync_time, scheduler):
     hour, minute = map(int, sync_time.split(':'))
     
     # Remove existing job if it exists
-    try:
+    if scheduler.get_job(f"sync_user_broken_{user_id}") is not None:
         scheduler.remove_job(f"sync_user_broken_{user_id}")
-    except:
-        pass
     
     # Schedule new job WITHOUT timezone (BROKEN VERSION)
     scheduler.add_job(
@@ -81,15 +69,15 @@ def schedule_sync_job_without_timezone(user_id, sync_time, scheduler):
     print(f"❌ BROKEN: Scheduled daily sync for user {user_id} at {hour}:{minute} (no timezone)")
     return scheduler.get_job(f"sync_user_broken_{user_id}")
 
-def main():
-    """Test the scheduler timezone fix"""
+def main(scheduler=None):
+    """Test the scheduler timezone fix, reusing a running scheduler if given"""
     print("Testing scheduler timezone fix...")
     print("=" * 50)
     
     # Get current time in different timezones
-    now_utc = datetime.now(pytz.UTC)
-    now_chicago = now_utc.astimezone(pytz.timezone('America/Chicago'))
-    now_local = datetime.now()
+    now_utc = datetime.now(UTC_TZ)
+    now_chicago = now_utc.astimezone(CHICAGO_TZ)
+    now_local = now_utc.astimezone()
     
     print(f"Current times:")
     print(f"  System local: {now_local}")
@@ -97,9 +85,11 @@ def main():
     print(f"  Chicago: {now_chicago}")
     print()
     
-    # Create scheduler
-    scheduler = BackgroundScheduler()
-    scheduler.start()
+    # Create scheduler unless the caller already has one running
+    owns_scheduler = scheduler is None
+    if owns_scheduler:
+        scheduler = BackgroundScheduler()
+        scheduler.start()
     
     # Test case: User wants sync at 9:00 AM local time
     sync_time = "09:00"
@@ -123,11 +113,8 @@ def main():
     
     # Calculate the difference
     if fixed_job.next_run_time and broken_job.next_run_time:
-        # Convert both to UTC for comparison
-        fixed_utc = fixed_job.next_run_time.astimezone(pytz.UTC) if fixed_job.next_run_time.tzinfo else pytz.UTC.localize(fixed_job.next_run_time)
-        broken_utc = broken_job.next_run_time.astimezone(pytz.UTC) if broken_job.next_run_time.tzinfo else pytz.UTC.localize(broken_job.next_run_time)
-        
-        diff = (fixed_utc - broken_utc).total_seconds() / 3600  # Convert to hours
+        # APScheduler's run times are timezone-aware, so they subtract directly
+        diff = (fixed_job.next_run_time - broken_job.next_run_time).total_seconds() / 3600  # Convert to hours
         
         print(f"\nTime difference: {diff} hours")
         
@@ -139,7 +126,11 @@ def main():
         else:
             print("✅ Both versions would run at the same time (timezone not an issue)")
     
-    scheduler.shutdown()
+    if owns_scheduler:
+        scheduler.shutdown()
+    else:
+        scheduler.remove_job(fixed_job.id)
+        scheduler.remove_job(broken_job.id)
     print("\nTest completed!")
 
 if __name__ == "__main__":
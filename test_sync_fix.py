@@ -3,8 +3,12 @@
 Test script to verify the sync functionality is working properly
 """
 
+import os
 import sys
-sys.path.append('backend')
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
 
 from app import app, db, User, ApiCredential, SyncLog, perform_sync
 from sync_service import perform_sync as sync_service_perform_sync
@@ -28,29 +32,28 @@ def test_sync_service():
         print("✅ Sync service handles errors properly")
 
 def test_database_models():
-    """Test database models"""
+    """Test database models (expects an active app context)"""
     print("\nTesting database models...")
     
-    with app.app_context():
-        try:
-            # Test user query
-            users = User.query.all()
-            print(f"✅ Found {len(users)} users")
-            
-            # Test credentials query
-            creds = ApiCredential.query.all()
-            print(f"✅ Found {len(creds)} credential records")
-            
-            # Test sync logs query
-            logs = SyncLog.query.all()
-            print(f"✅ Found {len(logs)} sync log records")
-            
-            print("✅ Database models working properly")
-            
-        except Exception as e:
-            print(f"❌ Database model error: {e}")
-            import traceback
-            traceback.print_exc()
+    try:
+        # Test user query
+        users = User.query.all()
+        print(f"✅ Found {len(users)} users")
+        
+        # Test credentials query
+        creds = ApiCredential.query.all()
+        print(f"✅ Found {len(creds)} credential records")
+        
+        # Test sync logs query
+        logs = SyncLog.query.all()
+        print(f"✅ Found {len(logs)} sync log records")
+        
+        print("✅ Database models working properly")
+        
+    except Exception as e:
+        print(f"❌ Database model error: {e}")
+        import traceback
+        traceback.print_exc()
 
 def test_app_routes():
     """Test basic app routes"""
@@ -81,9 +84,11 @@ if __name__ == "__main__":
     print("🔧 Testing Readwise-Twos Sync Application")
     print("=" * 50)
     
-    test_sync_service()
-    test_database_models()
-    test_app_routes()
+    # One app context for every check rather than one per function
+    with app.app_context():
+        test_sync_service()
+        test_database_models()
+        test_app_routes()
     
     print("\n" + "=" * 50)
     print("✅ All tests completed!")
\ No newline at end of file
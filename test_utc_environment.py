@@ -4,10 +4,12 @@ Test script to simulate UTC environment and show the timezone issue
 """
 
 import os
-import pytz
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from apscheduler.schedulers.background import BackgroundScheduler
 
+CHICAGO_TZ = ZoneInfo('America/Chicago')
+
 def main():
     """Test timezone handling in a simulated UTC environment"""
     print("Simulating UTC environment (like production servers)...")
@@ -37,13 +39,12 @@ def main():
     )
     
     # Schedule WITH timezone (fixed version)
-    chicago_tz = pytz.timezone('America/Chicago')
     scheduler.add_job(
         lambda: print("Job executed"),
         'cron',
         hour=hour,
         minute=minute,
-        timezone=chicago_tz,
+        timezone=CHICAGO_TZ,
         id='fixed_job'
     )
     
@@ -57,11 +58,8 @@ def main():
     
     # Calculate the difference
     if broken_job.next_run_time and fixed_job.next_run_time:
-        # Convert both to UTC for comparison
-        broken_utc = broken_job.next_run_time.astimezone(pytz.UTC) if broken_job.next_run_time.tzinfo else pytz.UTC.localize(broken_job.next_run_time)
-        fixed_utc = fixed_job.next_run_time.astimezone(pytz.UTC) if fixed_job.next_run_time.tzinfo else pytz.UTC.localize(fixed_job.next_run_time)
-        
-        diff_hours = (broken_utc - fixed_utc).total_seconds() / 3600
+        # APScheduler's run times are timezone-aware, so they subtract directly
+        diff_hours = (broken_job.next_run_time - fixed_job.next_run_time).total_seconds() / 3600
         
         print(f"\nTime difference: {diff_hours} hours")
         
@@ -0,0 +1,40 @@
+"""
+Canned Readwise API data shared by the test fixtures
+"""
+
+from datetime import datetime
+
+from readwise_twos_sync import json_utils
+
+# Computed once at import. perform_sync only keeps highlights updated after
+# its cutoff, so this has to be recent rather than a fixed date.
+NOW_ISO = datetime.utcnow().isoformat() + "Z"
+
+MOCK_HIGHLIGHTS = [
+    {
+        "id": 1,
+        "text": "Test highlight 1",
+        "book_id": 1,
+        "updated": NOW_ISO
+    },
+    {
+        "id": 2,
+        "text": "Test highlight 2",
+        "book_id": 2,
+        "updated": NOW_ISO
+    }
+]
+
+MOCK_BOOKS = [
+    {"id": 1, "title": "Test Book 1", "author": "Test Author 1"},
+    {"id": 2, "title": "Test Book 2", "author": "Test Author 2"}
+]
+
+# Single-page API responses wrapping the data above
+HIGHLIGHTS_PAGE = {"results": MOCK_HIGHLIGHTS, "next": None}
+BOOKS_PAGE = {"results": MOCK_BOOKS, "next": None}
+EMPTY_PAGE = {"results": [], "next": None}
+
+# The same pages serialized once, for mocks that serve raw response bodies
+HIGHLIGHTS_PAGE_BYTES = json_utils.dumps(HIGHLIGHTS_PAGE)
+BOOKS_PAGE_BYTES = json_utils.dumps(BOOKS_PAGE)
@@ -4,33 +4,150 @@ Test configuration and fixtures
 
 import pytest
 import os
-import tempfile
-from unittest.mock import Mock, patch
+from functools import lru_cache
+from unittest.mock import MagicMock, patch
 from cryptography.fernet import Fernet
-from datetime import datetime
+from requests import Response
+from requests.adapters import HTTPAdapter
+from sqlalchemy.orm import scoped_session, sessionmaker
+from werkzeug.security import generate_password_hash
+
+from readwise_twos_sync import json_utils
+
+from ._fixtures_data import BOOKS_PAGE_BYTES, HIGHLIGHTS_PAGE_BYTES
 
 # Set test environment
 os.environ['FLASK_ENV'] = 'testing'
 os.environ['ENCRYPTION_KEY'] = Fernet.generate_key().decode()
+# In-memory SQLite; must be set before backend.app is imported, since the
+# engine is built when the app module loads. Flask-SQLAlchemy pairs an
+# in-memory URI with a StaticPool so every session sees the same database.
+os.environ['DATABASE_URL'] = 'sqlite://'
 
-@pytest.fixture
-def app():
-    """Create and configure a test app."""
+# Test user password hash, computed once with a single PBKDF2 iteration
+TEST_PASSWORD_HASH = generate_password_hash("testpass123", method="pbkdf2:sha256:1")
+
+@pytest.fixture(scope='session')
+def _session_app():
+    """The test app, with its schema created once for the whole session."""
     from backend.app import app, db
     
-    # Create a temporary database
-    db_fd, db_path = tempfile.mkstemp()
     app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     app.config['WTF_CSRF_ENABLED'] = False
     
+    # Contexts are pushed per test by _appctx; holding one open here would
+    # leave every later test running inside it
     with app.app_context():
         db.create_all()
-        yield app
+    yield app
+    with app.app_context():
         db.drop_all()
+
+@pytest.fixture
+def app(_session_app):
+    """Create and configure a test app.
+
+    Each test runs inside one outer transaction that is rolled back at
+    teardown. db.session is swapped for a session joined to that
+    transaction, so its commits only release SAVEPOINTs.
+    """
+    from backend.app import db
+    
+    with _session_app.app_context():
+        connection = db.engine.connect()
+    # pysqlite defers BEGIN, which would let the outermost RELEASE SAVEPOINT
+    # commit for real; emit BEGIN ourselves for the duration of the test
+    dbapi_connection = connection.connection.driver_connection
+    isolation_level = dbapi_connection.isolation_level
+    dbapi_connection.isolation_level = None
+    transaction = connection.begin()
+    connection.exec_driver_sql("BEGIN")
+    
+    app_session = db.session
+    db.session = scoped_session(
+        sessionmaker(bind=connection, join_transaction_mode="create_savepoint")
+    )
+    try:
+        yield _session_app
+    finally:
+        db.session.remove()
+        db.session = app_session
+        transaction.rollback()
+        dbapi_connection.isolation_level = isolation_level
+        connection.close()
+
+@pytest.fixture(autouse=True)
+def _appctx(request):
+    """Push an app context for the duration of each test that uses the app.
+
+    Tests marked ``no_appctx`` opt out, to check code that pushes its own.
+    """
+    if 'app' not in request.fixturenames or request.node.get_closest_marker('no_appctx'):
+        yield
+        return
+    ctx = request.getfixturevalue('app').app_context()
+    ctx.push()
+    yield
+    ctx.pop()
+
+@pytest.fixture(scope='session')
+def _session_scheduler():
+    """One started BackgroundScheduler shared by the whole test session.
+
+    Tests only read next_run_time, which APScheduler computes once the
+    scheduler has started, so it is started paused with an in-memory job
+    store and a single executor worker.
+    """
+    from apscheduler.executors.pool import ThreadPoolExecutor
+    from apscheduler.jobstores.memory import MemoryJobStore
+    from apscheduler.schedulers.background import BackgroundScheduler
+    
+    scheduler = BackgroundScheduler(
+        jobstores={'default': MemoryJobStore()},
+        executors={'default': ThreadPoolExecutor(max_workers=1)},
+        job_defaults={'coalesce': True}
+    )
+    scheduler.start(paused=True)
+    yield scheduler
+    scheduler.shutdown(wait=False)
+
+@pytest.fixture
+def background_scheduler(_session_scheduler):
+    """The shared scheduler, emptied of jobs from earlier tests."""
+    _session_scheduler.remove_all_jobs()
+    yield _session_scheduler
+    _session_scheduler.remove_all_jobs()
+
+@pytest.fixture(scope='session', autouse=True)
+def _session_scheduler_stub():
+    """Replace the app's APScheduler with one MagicMock for the whole session."""
+    stub = MagicMock()
+    stub.running = True
+    stub.get_jobs.return_value = []
+    with patch('backend.app.scheduler', stub):
+        yield stub
+
+@pytest.fixture
+def mock_scheduler(_session_scheduler_stub):
+    """The app's stub scheduler, with calls from earlier tests cleared."""
+    _session_scheduler_stub.reset_mock()
+    return _session_scheduler_stub
+
+@pytest.fixture(scope='session')
+def encrypted_tokens():
+    """Test API tokens encrypted once in the app's current storage format.
     
-    os.close(db_fd)
-    os.unlink(db_path)
+    encrypt_token seals with AES-GCM, so the sync and credential tests decrypt
+    through the compiled AEAD path rather than legacy Fernet's HMAC check.
+    test_utils covers reading legacy Fernet tokens separately.
+    """
+    from backend.app import encrypt_token
+    
+    return {
+        'readwise': encrypt_token('test_readwise_token'),
+        'twos': encrypt_token('test_twos_token'),
+        'cap': encrypt_token('cap_token')
+    }
 
 @pytest.fixture
 def client(app):
@@ -42,95 +159,126 @@ def runner(app):
     """Create a test CLI runner."""
     return app.test_cli_runner()
 
+@lru_cache(maxsize=None)
+def _access_token(identity):
+    """Sign a JWT for identity once per test session.
+
+    Each test's rows are rolled back, so the test user is recreated with the
+    same id and the token stays valid across tests.
+    """
+    from flask_jwt_extended import create_access_token
+    
+    return create_access_token(identity=identity)
+
 @pytest.fixture
 def auth_headers(app, client):
     """Create authentication headers for API requests."""
     from backend.app import User, db
-    from werkzeug.security import generate_password_hash
-    from flask_jwt_extended import create_access_token
     
-    with app.app_context():
-        # Create a test user
-        user = User(
-            name="Test User",
-            email="test@example.com",
-            password_hash=generate_password_hash("testpass123"),
-            sync_enabled=True,
-            sync_time="09:00",
-            sync_frequency="daily"
-        )
-        db.session.add(user)
-        db.session.commit()
-        
-        # Create JWT token
-        token = create_access_token(identity=str(user.id))
-        
-        return {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }, user.id
+    # Create a test user
+    user = User(
+        name="Test User",
+        email="test@example.com",
+        password_hash=TEST_PASSWORD_HASH,
+        sync_enabled=True,
+        sync_time="09:00",
+        sync_frequency="daily"
+    )
+    db.session.add(user)
+    db.session.commit()
+    
+    # Create JWT token
+    token = _access_token(str(user.id))
+    
+    return {
+        'Authorization': f'Bearer {token}',
+        'Content-Type': 'application/json'
+    }, user.id
+
+class _PageResponse:
+    """Successful Readwise response serving a pre-serialized JSON body."""
+    
+    __slots__ = ('content', 'status_code', 'headers')
+    
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+        self.headers = {}
+    
+    def json(self):
+        return json_utils.loads(self.content)
+    
+    def raise_for_status(self):
+        pass
+
+@pytest.fixture(scope='session')
+def readwise_payload_bytes():
+    """Readwise highlight and book pages, serialized once per session."""
+    return {'highlights': HIGHLIGHTS_PAGE_BYTES, 'books': BOOKS_PAGE_BYTES}
 
 @pytest.fixture
-def mock_readwise_api():
+def seeded_credentials(auth_headers, encrypted_tokens):
+    """Store the test user's Readwise, Twos and Capacities credentials."""
+    from backend.app import ApiCredential, db
+    
+    _, user_id = auth_headers
+    db.session.execute(ApiCredential.__table__.insert(), [{
+        'user_id': user_id,
+        'readwise_token': encrypted_tokens['readwise'],
+        'twos_user_id': 'test_twos_user',
+        'twos_token': encrypted_tokens['twos'],
+        'capacities_space_id': 'space123',
+        'capacities_token': encrypted_tokens['cap']
+    }])
+    db.session.commit()
+    return user_id
+
+@pytest.fixture
+def mock_readwise_api(readwise_payload_bytes):
     """Mock Readwise API responses."""
-    now = datetime.utcnow().isoformat() + "Z"
-    mock_highlights = [
-        {
-            "id": 1,
-            "text": "This is a test highlight",
-            "book_id": 1,
-            "updated": now
-        },
-        {
-            "id": 2,
-            "text": "Another test highlight",
-            "book_id": 2,
-            "updated": now
-        }
-    ]
-    
-    mock_books = [
-        {
-            "id": 1,
-            "title": "Test Book 1",
-            "author": "Test Author 1"
-        },
-        {
-            "id": 2,
-            "title": "Test Book 2",
-            "author": "Test Author 2"
-        }
-    ]
-    
-    with patch('requests.get') as mock_get:
-        def side_effect(url, **kwargs):
-            mock_response = Mock()
-            mock_response.raise_for_status.return_value = None
-            
-            if 'highlights' in url:
-                mock_response.json.return_value = {
-                    "results": mock_highlights,
-                    "next": None
-                }
-            elif 'books' in url:
-                mock_response.json.return_value = {
-                    "results": mock_books,
-                    "next": None
-                }
-            
-            return mock_response
-        
-        mock_get.side_effect = side_effect
+    highlights = _PageResponse(readwise_payload_bytes['highlights'])
+    books = _PageResponse(readwise_payload_bytes['books'])
+    
+    with patch('requests.Session.get') as mock_get:
+        mock_get.side_effect = lambda url, **kwargs: highlights if 'highlights' in url else books
         yield mock_get
 
+class _RecordingAdapter(HTTPAdapter):
+    """Transport adapter that answers every request with a canned 200.
+    
+    Sent requests are kept in ``requests`` so tests can inspect the bodies
+    without any network access.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+    
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        response = Response()
+        response.status_code = 200
+        response._content = b"Success"
+        response.url = request.url
+        response.request = request
+        return response
+
+@pytest.fixture(scope='session')
+def _twos_adapter():
+    """One recording adapter for the whole session."""
+    return _RecordingAdapter()
+
 @pytest.fixture
-def mock_post_requests():
-    """Mock external POST requests to third-party services."""
-    with patch('requests.post') as mock_post:
-        mock_response = Mock()
-        mock_response.raise_for_status.return_value = None
-        mock_response.status_code = 200
-        mock_response.text = "Success"
-        mock_post.return_value = mock_response
-        yield mock_post
+def mock_twos_api(_twos_adapter):
+    """Route the backend's HTTPS session through the recording adapter."""
+    from backend.app import http_session
+    
+    _twos_adapter.requests.clear()
+    original = http_session.get_adapter('https://')
+    http_session.mount('https://', _twos_adapter)
+    try:
+        yield _twos_adapter
+    finally:
+        http_session.mount('https://', original)
+
 
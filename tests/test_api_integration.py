@@ -4,64 +4,39 @@ Test API integration with external services
 
 import pytest
 import json
-from unittest.mock import patch, Mock
-from datetime import datetime
-from backend.app import perform_sync
+import responses
+import threading
+from collections import OrderedDict
+
+from backend import app as backend_app
+from backend.app import perform_sync, fetch_all_books
+
+from ._fixtures_data import BOOKS_PAGE, EMPTY_PAGE, HIGHLIGHTS_PAGE, MOCK_BOOKS, MOCK_HIGHLIGHTS
+
+HIGHLIGHTS_URL = "https://readwise.io/api/v2/highlights/"
+BOOKS_URL = "https://readwise.io/api/v2/books/"
+TWOS_URL = "https://www.twosapp.com/apiV2/user/addToToday"
+CAPACITIES_URL = "https://api.capacities.io/save-to-daily-note"
+
+
+def _calls_to(host):
+    """Requests recorded by responses whose URL contains host."""
+    return [call for call in responses.calls if host in call.request.url]
 
 
 class TestAPIIntegration:
     """Test integration with Readwise, Twos, and Capacities APIs."""
     
-    @patch('requests.get')
-    @patch('requests.post')
-    def test_perform_sync_success(self, mock_post, mock_get):
+    @responses.activate
+    def test_perform_sync_success(self):
         """Test successful sync operation."""
         # Mock Readwise API responses
-        now = datetime.utcnow().isoformat() + "Z"
-        mock_highlights_response = Mock()
-        mock_highlights_response.raise_for_status.return_value = None
-        mock_highlights_response.json.return_value = {
-            "results": [
-                {
-                    "id": 1,
-                    "text": "Test highlight 1",
-                    "book_id": 1,
-                    "updated": now
-                },
-                {
-                    "id": 2,
-                    "text": "Test highlight 2",
-                    "book_id": 2,
-                    "updated": now
-                }
-            ],
-            "next": None
-        }
-        
-        mock_books_response = Mock()
-        mock_books_response.raise_for_status.return_value = None
-        mock_books_response.json.return_value = {
-            "results": [
-                {"id": 1, "title": "Test Book 1", "author": "Test Author 1"},
-                {"id": 2, "title": "Test Book 2", "author": "Test Author 2"}
-            ],
-            "next": None
-        }
-        
-        def get_side_effect(url, **kwargs):
-            if 'highlights' in url:
-                return mock_highlights_response
-            elif 'books' in url:
-                return mock_books_response
-            return Mock()
-        
-        mock_get.side_effect = get_side_effect
-        
-        # Mock Twos API response
-        mock_twos_response = Mock()
-        mock_twos_response.raise_for_status.return_value = None
-        mock_twos_response.status_code = 200
-        mock_post.return_value = mock_twos_response
+        responses.add(responses.GET, HIGHLIGHTS_URL, json=HIGHLIGHTS_PAGE)
+        responses.add(responses.GET, BOOKS_URL, json=BOOKS_PAGE)
+        
+        # Mock Twos and Capacities API responses
+        responses.add(responses.POST, TWOS_URL, body="Success")
+        responses.add(responses.POST, CAPACITIES_URL, body="Success")
         
         # Perform sync
         result = perform_sync(
@@ -79,19 +54,23 @@ class TestAPIIntegration:
         assert 'Successfully synced' in result['message']
         
         # Verify API calls were made
-        assert mock_get.call_count >= 2  # At least highlights and books calls
-        assert mock_post.call_count == 3  # Two highlights to Twos and one to Capacities
-
-        twos_calls = [c for c in mock_post.call_args_list if 'twosapp' in c.args[0]]
-        cap_calls = [c for c in mock_post.call_args_list if 'capacities' in c.args[0]]
-        assert len(twos_calls) == 2
-        assert len(cap_calls) == 1
+        assert len(_calls_to('readwise.io')) >= 2  # At least highlights and books calls
+        
+        twos_calls = _calls_to('twosapp')
+        cap_calls = _calls_to('capacities')
+        assert len(twos_calls) == 1  # One batched post to Twos
+        assert len(cap_calls) == 1  # One post to Capacities
+        assert json.loads(twos_calls[0].request.body)['text'] == (
+            "Test Book 1, Test Author 1: Test highlight 1\n"
+            "Test Book 2, Test Author 2: Test highlight 2"
+        )
     
-    @patch('requests.get')
-    def test_readwise_api_error(self, mock_get):
+    @responses.activate
+    def test_readwise_api_error(self):
         """Test handling of Readwise API errors."""
         # Mock API error
-        mock_get.side_effect = Exception("Readwise API error")
+        responses.add(responses.GET, HIGHLIGHTS_URL, body=Exception("Readwise API error"))
+        responses.add(responses.GET, BOOKS_URL, body=Exception("Readwise API error"))
         
         # Perform sync and expect it to raise an exception
         with pytest.raises(Exception) as exc_info:
@@ -106,36 +85,15 @@ class TestAPIIntegration:
         
         assert "Readwise API error" in str(exc_info.value)
     
-    @patch('requests.get')
-    @patch('requests.post')
-    def test_twos_api_error(self, mock_post, mock_get):
+    @responses.activate
+    def test_twos_api_error(self):
         """Test handling of Twos API errors."""
         # Mock successful Readwise responses
-        mock_highlights_response = Mock()
-        mock_highlights_response.raise_for_status.return_value = None
-        now = datetime.utcnow().isoformat() + "Z"
-        mock_highlights_response.json.return_value = {
-            "results": [{"id": 1, "text": "Test", "book_id": 1, "updated": now}],
-            "next": None
-        }
-        
-        mock_books_response = Mock()
-        mock_books_response.raise_for_status.return_value = None
-        mock_books_response.json.return_value = {
-            "results": [{"id": 1, "title": "Test Book", "author": "Test Author"}],
-            "next": None
-        }
-        
-        def get_side_effect(url, **kwargs):
-            if 'highlights' in url:
-                return mock_highlights_response
-            elif 'books' in url:
-                return mock_books_response
-        
-        mock_get.side_effect = get_side_effect
+        responses.add(responses.GET, HIGHLIGHTS_URL, json={"results": MOCK_HIGHLIGHTS[:1], "next": None})
+        responses.add(responses.GET, BOOKS_URL, json={"results": MOCK_BOOKS[:1], "next": None})
         
         # Mock Twos API error
-        mock_post.side_effect = Exception("Twos API error")
+        responses.add(responses.POST, TWOS_URL, body=Exception("Twos API error"))
         
         # Perform sync and expect it to raise an exception
         with pytest.raises(Exception):
@@ -147,24 +105,28 @@ class TestAPIIntegration:
                 user_id=1
             )
     
-    @patch('requests.get')
-    @patch('requests.post')
-    def test_no_highlights_found(self, mock_post, mock_get):
+    @responses.activate
+    def test_no_highlights_found(self, monkeypatch):
         """Test sync when no new highlights are found."""
-        # Mock empty Readwise response
-        mock_response = Mock()
-        mock_response.raise_for_status.return_value = None
-        mock_response.json.return_value = {
-            "results": [],
-            "next": None
-        }
-        mock_get.return_value = mock_response
-        
-        # Mock Twos API response
-        mock_twos_response = Mock()
-        mock_twos_response.raise_for_status.return_value = None
-        mock_twos_response.status_code = 200
-        mock_post.return_value = mock_twos_response
+        # Mock empty Readwise responses
+        responses.add(responses.GET, HIGHLIGHTS_URL, json=EMPTY_PAGE)
+        
+        # Books request that only finishes once the test releases it
+        books_started = threading.Event()
+        release_books = threading.Event()
+        books_finished = threading.Event()
+        
+        def slow_fetch_all_books(readwise_token, user_id=None, refresh=False):
+            books_started.set()
+            release_books.wait(timeout=5)
+            books_finished.set()
+            return {}
+        
+        monkeypatch.setattr(backend_app, 'fetch_all_books', slow_fetch_all_books)
+        
+        # Mock Twos and Capacities API responses
+        responses.add(responses.POST, TWOS_URL, body="Success")
+        responses.add(responses.POST, CAPACITIES_URL, body="Success")
         
         # Perform sync
         result = perform_sync(
@@ -182,14 +144,112 @@ class TestAPIIntegration:
         assert 'No new highlights' in result['message']
         
         # Should still post to both services (one each)
-        assert mock_post.call_count == 2
-        twos_calls = [c for c in mock_post.call_args_list if 'twosapp' in c.args[0]]
-        cap_calls = [c for c in mock_post.call_args_list if 'capacities' in c.args[0]]
-        assert len(twos_calls) == 1
-        assert len(cap_calls) == 1
+        assert len(_calls_to('twosapp')) == 1
+        assert len(_calls_to('capacities')) == 1
+        
+        # The books request was started but the sync didn't wait on it
+        assert books_started.wait(timeout=5)
+        assert not books_finished.is_set()
+        release_books.set()
+    
+    @responses.activate
+    def test_fetch_all_books_reuses_cache_on_304(self):
+        """Test that unchanged book lists are served from the cache."""
+        # Registered responses for the same URL are served in order
+        responses.add(
+            responses.GET,
+            BOOKS_URL,
+            json={
+                "results": [{"id": 1, "title": "Test Book", "author": "Test Author"}],
+                "next": None
+            },
+            headers={"ETag": '"books-v1"'}
+        )
+        responses.add(responses.GET, BOOKS_URL, status=304)
+        
+        first = fetch_all_books('etag_cache_token', user_id=101)
+        second = fetch_all_books('etag_cache_token', user_id=101)
+        
+        assert second == first == {1: {"title": "Test Book", "author": "Test Author"}}
+        assert len(responses.calls) == 2
+        assert responses.calls[1].request.headers['If-None-Match'] == '"books-v1"'
+    
+    @responses.activate
+    def test_perform_sync_refetches_books_missing_from_cache(self, app, monkeypatch):
+        """Test that a 304 on the first books page can't hide newer books."""
+        monkeypatch.setattr(backend_app, '_books_cache', OrderedDict())
+        responses.add(responses.GET, HIGHLIGHTS_URL, json=HIGHLIGHTS_PAGE)
+        # Cached list only has book 1; the revalidation says page 1 is
+        # unchanged, and the full refetch finds book 2 on a later page
+        responses.add(
+            responses.GET,
+            BOOKS_URL,
+            json={"results": MOCK_BOOKS[:1], "next": None},
+            headers={"ETag": '"books-v1"'}
+        )
+        responses.add(responses.GET, BOOKS_URL, status=304)
+        responses.add(responses.GET, BOOKS_URL, json=BOOKS_PAGE)
+        responses.add(responses.POST, TWOS_URL, body="Success")
+        fetch_all_books('test_readwise_token', user_id=104)
+        
+        result = perform_sync(
+            readwise_token='test_readwise_token',
+            twos_user_id='test_twos_user',
+            twos_token='test_twos_token',
+            days_back=1,
+            user_id=104
+        )
+        
+        assert result['highlights_synced'] == 2
+        books_calls = _calls_to('/books/')
+        assert len(books_calls) == 3
+        assert 'If-None-Match' not in books_calls[2].request.headers
+        assert json.loads(_calls_to('twosapp')[0].request.body)['text'] == (
+            "Test Book 1, Test Author 1: Test highlight 1\n"
+            "Test Book 2, Test Author 2: Test highlight 2"
+        )
     
+    @responses.activate
+    def test_fetch_all_books_cache_is_per_user_and_token(self, monkeypatch):
+        """Test that cached books are keyed by user id and dropped on a new token."""
+        responses.add(
+            responses.GET,
+            BOOKS_URL,
+            json={"results": [], "next": None},
+            headers={"ETag": '"books-v1"'}
+        )
+        monkeypatch.setattr(backend_app, '_books_cache', OrderedDict())
+        
+        fetch_all_books('first_token', user_id=102)
+        fetch_all_books('second_token', user_id=102)
+        fetch_all_books('first_token', user_id=103)
+        
+        assert list(backend_app._books_cache) == [102, 103]
+        assert not any('If-None-Match' in call.request.headers for call in responses.calls)
+    
+    @responses.activate
+    def test_fetch_all_books_cache_is_bounded(self, monkeypatch):
+        """Test that the least recently used user is evicted."""
+        responses.add(
+            responses.GET,
+            BOOKS_URL,
+            json={"results": [], "next": None},
+            headers={"ETag": '"books-v1"'}
+        )
+        monkeypatch.setattr(backend_app, '_books_cache', OrderedDict())
+        monkeypatch.setattr(backend_app, 'BOOKS_CACHE_SIZE', 2)
+        
+        for user_id in (1, 2, 3):
+            fetch_all_books('token', user_id=user_id)
+        
+        assert list(backend_app._books_cache) == [2, 3]
+    
+    @responses.activate
     def test_invalid_sync_parameters(self):
         """Test sync with invalid parameters."""
+        responses.add(responses.GET, HIGHLIGHTS_URL, status=401)
+        responses.add(responses.GET, BOOKS_URL, status=401)
+        
         with pytest.raises(Exception):
             perform_sync(
                 readwise_token='',  # Empty token
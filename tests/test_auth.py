@@ -3,9 +3,13 @@ Test authentication functionality
 """
 
 import pytest
-import json
 from werkzeug.security import generate_password_hash
-from backend.app import User, db
+from readwise_twos_sync import json_utils
+from backend.app import ApiCredential, User, db
+
+# Hashed once with a single PBKDF2 iteration; the tests only need a hash
+# check_password_hash accepts, not a slow one
+PASSWORD_HASH = generate_password_hash("password123", method="pbkdf2:sha256:1")
 
 
 class TestAuthentication:
@@ -15,84 +19,101 @@ class TestAuthentication:
         """Test basic health endpoint."""
         response = client.get('/health')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['status'] == 'healthy'
     
     def test_register_user(self, app, client):
         """Test user registration."""
-        with app.app_context():
-            response = client.post('/api/auth/register',
-                json={
-                    'name': 'New User',
-                    'email': 'newuser@example.com',
-                    'password': 'password123'
-                }
-            )
-            assert response.status_code == 201
-            data = json.loads(response.data)
-            assert 'access_token' in data
-            assert data['user']['email'] == 'newuser@example.com'
+        response = client.post('/api/auth/register',
+            json={
+                'name': 'New User',
+                'email': 'newuser@example.com',
+                'password': 'password123'
+            }
+        )
+        assert response.status_code == 201
+        data = response.get_json()
+        assert 'access_token' in data
+        assert data['user']['email'] == 'newuser@example.com'
     
     def test_register_duplicate_email(self, app, client):
         """Test registration with duplicate email."""
-        with app.app_context():
-            # Create first user
-            user = User(
-                name="Existing User",
-                email="existing@example.com",
-                password_hash=generate_password_hash("password123")
-            )
-            db.session.add(user)
-            db.session.commit()
-            
-            # Try to register with same email
-            response = client.post('/api/auth/register',
-                json={
-                    'name': 'Another User',
-                    'email': 'existing@example.com',
-                    'password': 'password123'
-                }
-            )
-            assert response.status_code == 400
-            data = json.loads(response.data)
-            assert 'already registered' in data['error']
+        # Create first user
+        user = User(
+            name="Existing User",
+            email="existing@example.com",
+            password_hash=PASSWORD_HASH
+        )
+        db.session.add(user)
+        db.session.commit()
+        
+        # Try to register with same email
+        response = client.post('/api/auth/register',
+            json={
+                'name': 'Another User',
+                'email': 'existing@example.com',
+                'password': 'password123'
+            }
+        )
+        assert response.status_code == 400
+        data = response.get_json()
+        assert 'already registered' in data['error']
     
     def test_login_success(self, app, client):
         """Test successful login."""
-        with app.app_context():
-            # Create test user
-            user = User(
-                name="Test User",
-                email="test@example.com",
-                password_hash=generate_password_hash("password123")
-            )
-            db.session.add(user)
-            db.session.commit()
-            
-            # Login
-            response = client.post('/api/auth/login',
-                json={
-                    'email': 'test@example.com',
-                    'password': 'password123'
-                }
-            )
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert 'access_token' in data
-            assert data['user']['email'] == 'test@example.com'
+        # Create test user
+        user = User(
+            name="Test User",
+            email="test@example.com",
+            password_hash=PASSWORD_HASH
+        )
+        db.session.add(user)
+        db.session.commit()
+        
+        # Login
+        response = client.post('/api/auth/login',
+            json={
+                'email': 'test@example.com',
+                'password': 'password123'
+            }
+        )
+        assert response.status_code == 200
+        data = response.get_json()
+        assert 'access_token' in data
+        assert data['user']['email'] == 'test@example.com'
     
     def test_login_invalid_credentials(self, app, client):
         """Test login with invalid credentials."""
-        with app.app_context():
-            response = client.post('/api/auth/login',
-                json={
-                    'email': 'nonexistent@example.com',
-                    'password': 'wrongpassword'
-                }
-            )
-            assert response.status_code == 401
-            data = json.loads(response.data)
-            assert 'Invalid email or password' in data['error']
+        response = client.post('/api/auth/login',
+            json={
+                'email': 'nonexistent@example.com',
+                'password': 'wrongpassword'
+            }
+        )
+        assert response.status_code == 401
+        data = response.get_json()
+        assert 'Invalid email or password' in data['error']
+    
+    def test_login_rejects_user_without_password(self, app, client):
+        """Test that OAuth-only users can't log in with a password."""
+        user = User(
+            name="Google User",
+            email="google@example.com",
+            auth_provider="google",
+            auth_provider_id="google123"
+        )
+        db.session.add(user)
+        db.session.commit()
+        
+        response = client.post('/api/auth/login',
+            json={
+                'email': 'google@example.com',
+                'password': 'anything'
+            }
+        )
+        assert response.status_code == 401
+        data = response.get_json()
+        assert 'Invalid email or password' in data['error']
     
     def test_protected_endpoint_without_token(self, client):
         """Test accessing protected endpoint without token."""
@@ -104,6 +125,34 @@ class TestAuthentication:
         headers, user_id = auth_headers
         response = client.get('/api/user', headers=headers)
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['email'] == 'test@example.com'
 
+
+class TestAdminEndpoints:
+    """Test the session-authenticated admin and debug endpoints."""
+    
+    def test_debug_users_ndjson_lists_each_user_once(self, app, client, auth_headers, encrypted_tokens):
+        """Test that a user with several credential rows is streamed once."""
+        _, user_id = auth_headers
+        admin = User(name="Admin", email="jkuhns13@gmail.com", password_hash=PASSWORD_HASH)
+        db.session.add(admin)
+        db.session.commit()
+        db.session.execute(ApiCredential.__table__.insert(), [
+            {'user_id': user_id, 'readwise_token': encrypted_tokens['readwise'], 'twos_user_id': 'first'},
+            {'user_id': user_id, 'readwise_token': encrypted_tokens['readwise'], 'twos_user_id': 'second'}
+        ])
+        db.session.commit()
+        
+        with client.session_transaction() as sess:
+            sess['user_id'] = admin.id
+        response = client.get('/debug/users', headers={'Accept': 'application/x-ndjson'})
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        users = [json_utils.loads(line) for line in response.data.splitlines()]
+        assert [u['id'] for u in users] == sorted([user_id, admin.id])
+        by_id = {u['id']: u for u in users}
+        assert by_id[user_id]['has_credentials'] is True
+        assert by_id[user_id]['twos_user_id'] == 'first'
+        assert by_id[admin.id]['has_credentials'] is False
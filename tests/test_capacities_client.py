@@ -1,40 +1,62 @@
-from unittest.mock import Mock, patch
+import json
 from datetime import datetime
 
+import pytest
+import responses
+
 from readwise_twos_sync.capacities_client import CapacitiesClient
 
+CAPACITIES_URL = "https://api.capacities.io/save-to-daily-note"
+
+
+@pytest.fixture(scope="module")
+def _capacities_api():
+    """One responses mock for the module, with the daily-note endpoint registered."""
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.POST, CAPACITIES_URL, json={}, status=200)
+        yield rsps
+
+
+@pytest.fixture
+def capacities_api(_capacities_api):
+    """The module's responses mock, with calls from earlier tests cleared."""
+    _capacities_api.calls.reset()
+    return _capacities_api
 
-def test_post_highlights_sends_markdown():
+
+def test_post_highlights_sends_markdown(capacities_api):
     client = CapacitiesClient(token="token", space_id="space")
 
     highlights = [{"book_id": 1, "text": "Quote"}]
     books = {1: {"title": "Book", "author": "Author"}}
 
-    mock_response = Mock()
-    mock_response.raise_for_status.return_value = None
-
-    with patch("readwise_twos_sync.capacities_client.requests.post", return_value=mock_response) as mock_post:
-        client.post_highlights(highlights, books)
+    client.post_highlights(highlights, books)
 
-        mock_post.assert_called_once()
-        url = mock_post.call_args[0][0]
-        assert url == "https://api.capacities.io/save-to-daily-note"
-        payload = mock_post.call_args[1]["json"]
-        assert payload["spaceId"] == "space"
-        assert payload["mdText"] == "- Quote — Book, Author"
+    assert len(capacities_api.calls) == 1
+    request = capacities_api.calls[-1].request
+    assert request.url == CAPACITIES_URL
+    payload = json.loads(request.body)
+    assert payload["spaceId"] == "space"
+    assert payload["mdText"] == "- Quote — Book, Author"
 
 
-def test_post_highlights_handles_empty_list():
+def test_post_highlights_handles_empty_list(capacities_api):
     client = CapacitiesClient(token="token", space_id="space")
 
-    mock_response = Mock()
-    mock_response.raise_for_status.return_value = None
+    client.post_highlights([], {})
+
+    assert len(capacities_api.calls) == 1
+    payload = json.loads(capacities_api.calls[-1].request.body)
+    assert payload["spaceId"] == "space"
+    today = datetime.now().strftime("%Y-%m-%d")
+    assert payload["mdText"] == f"No new highlights for {today}"
 
-    with patch("readwise_twos_sync.capacities_client.requests.post", return_value=mock_response) as mock_post:
-        client.post_highlights([], {})
 
-        mock_post.assert_called_once()
-        payload = mock_post.call_args[1]["json"]
-        assert payload["spaceId"] == "space"
-        today = datetime.now().strftime("%Y-%m-%d")
-        assert payload["mdText"] == f"No new highlights for {today}"
+def test_session_only_retries_posts_capacities_cannot_have_stored():
+    client = CapacitiesClient(token="token", space_id="space")
+
+    retries = client.session.get_adapter(CAPACITIES_URL).max_retries
+    assert retries.read == 0
+    assert retries.other == 0
+    assert retries.status_forcelist == [429]
+    assert retries.respect_retry_after_header
@@ -0,0 +1,53 @@
+import os
+
+from readwise_twos_sync.config import Config, load_env_file, parse_env_file
+
+
+def test_parse_env_file_handles_comments_quotes_and_export(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text(
+        "# Readwise\n"
+        "READWISE_TOKEN=abc123\n"
+        "\n"
+        "export TWOS_USER_ID = user-1\n"
+        "TWOS_TOKEN=\"quoted # not a comment\"\n"
+        "CAPACITIES_TOKEN='single'\n"
+        "SYNC_DAYS_BACK=3 # inline comment\n"
+        "not a setting\n"
+    )
+
+    assert parse_env_file(env_file) == {
+        "READWISE_TOKEN": "abc123",
+        "TWOS_USER_ID": "user-1",
+        "TWOS_TOKEN": "quoted # not a comment",
+        "CAPACITIES_TOKEN": "single",
+        "SYNC_DAYS_BACK": "3",
+    }
+
+
+def test_load_env_file_does_not_override_environment(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("READWISE_TOKEN=from-file\nSYNC_DAYS_BACK=3\n")
+    monkeypatch.setenv("READWISE_TOKEN", "from-env")
+    monkeypatch.delenv("SYNC_DAYS_BACK", raising=False)
+
+    load_env_file(env_file)
+
+    assert os.environ["READWISE_TOKEN"] == "from-env"
+    assert os.environ["SYNC_DAYS_BACK"] == "3"
+
+
+def test_config_reads_env_file_when_credentials_are_already_set(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("SYNC_DAYS_BACK=3\nLAST_SYNC_FILE=custom.json\nTWOS_TOKEN=from-file\n")
+    monkeypatch.setattr(os, "environ", {
+        "READWISE_TOKEN": "rw",
+        "TWOS_USER_ID": "user",
+        "TWOS_TOKEN": "from-env",
+    })
+
+    config = Config(env_file=str(env_file))
+
+    assert config.sync_days_back == 3
+    assert config.last_sync_file.name == "custom.json"
+    assert config.twos_token == "from-env"
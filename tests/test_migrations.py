@@ -1,46 +1,88 @@
 import sqlite3
+import sys
 import importlib.util
+import pytest
 from pathlib import Path
-from sqlalchemy import inspect
+from sqlalchemy import create_engine, inspect
 
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+# backend/app.py falls back to top-level imports of its sibling modules when
+# it isn't loaded as part of the backend package
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
 
-def load_temp_app(tmp_db):
-    spec = importlib.util.spec_from_file_location(
-        "temp_app", Path(__file__).resolve().parents[1] / "backend" / "app.py"
-    )
-    module = importlib.util.module_from_spec(spec)
-    import os, sys
+TEMP_APP_SPEC = importlib.util.spec_from_file_location("temp_app", BACKEND_DIR / "app.py")
 
-    prev = os.environ.get("DATABASE_URL")
-    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_db}"
-    backend_path = str(Path(__file__).resolve().parents[1] / "backend")
-    sys.path.insert(0, backend_path)
-    try:
-        spec.loader.exec_module(module)
-    finally:
-        sys.path.remove(backend_path)
-        if prev is None:
-            os.environ.pop("DATABASE_URL", None)
-        else:
-            os.environ["DATABASE_URL"] = prev
-    return module
 
+def old_schema_db(tmp_path):
+    """Create a pre-Capacities api_credentials table in a shared in-memory DB.
 
-def test_app_auto_adds_capacities_columns(tmp_path):
-    db_path = tmp_path / "old.db"
-    conn = sqlite3.connect(db_path)
-    conn.execute(
+    Returns the connection keeping the database alive and its SQLAlchemy URL.
+    """
+    name = tmp_path / "old.db"
+    keeper = sqlite3.connect(f"file:{name}?mode=memory&cache=shared", uri=True)
+    keeper.execute(
         "CREATE TABLE api_credentials (id INTEGER PRIMARY KEY, user_id INTEGER, readwise_token TEXT, twos_user_id TEXT, twos_token TEXT, created_at DATETIME, updated_at DATETIME)"
     )
-    conn.commit()
-    conn.close()
+    keeper.commit()
+    return keeper, f"sqlite:///file:{name}?mode=memory&cache=shared&uri=true"
+
+
+def load_temp_app():
+    """Execute a fresh copy of backend/app.py against the current DATABASE_URL."""
+    module = importlib.util.module_from_spec(TEMP_APP_SPEC)
+    TEMP_APP_SPEC.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def migrated_app(tmp_path_factory):
+    """backend.app loaded once against the legacy schema, shared by this module."""
+    keeper, db_url = old_schema_db(tmp_path_factory.mktemp("migrations"))
 
-    app_module = load_temp_app(db_path)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DATABASE_URL", db_url)
+        app_module = load_temp_app()
     try:
-        with app_module.app.app_context():
-            inspector = inspect(app_module.db.engine)
-            columns = [c["name"] for c in inspector.get_columns("api_credentials")]
-            assert "capacities_space_id" in columns
-            assert "capacities_token" in columns
+        yield app_module
     finally:
         app_module.scheduler.shutdown(wait=False)
+        keeper.close()
+
+
+def test_app_auto_adds_capacities_columns(migrated_app):
+    with migrated_app.app.app_context():
+        inspector = inspect(migrated_app.db.engine)
+        columns = [c["name"] for c in inspector.get_columns("api_credentials")]
+        assert "capacities_space_id" in columns
+        assert "capacities_token" in columns
+
+
+def test_app_adds_missing_indexes(migrated_app):
+    with migrated_app.app.app_context():
+        inspector = inspect(migrated_app.db.engine)
+        cred_indexes = {i["name"] for i in inspector.get_indexes("api_credentials")}
+        log_indexes = {i["name"] for i in inspector.get_indexes("sync_logs")}
+        user_indexes = {i["name"] for i in inspector.get_indexes("users")}
+        assert "ix_api_credentials_user_id" in cred_indexes
+        assert "ix_sync_logs_user_created" in log_indexes
+        assert "ix_users_provider" in user_indexes
+
+
+def test_ensure_capacities_columns_relaxes_not_null_on_sqlite(tmp_path):
+    pytest.importorskip("alembic")
+    from db_utils import ensure_capacities_columns
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE api_credentials (id INTEGER PRIMARY KEY, user_id INTEGER, readwise_token TEXT, twos_user_id TEXT NOT NULL, twos_token TEXT NOT NULL)"
+        )
+
+    ensure_capacities_columns(engine)
+
+    columns = {c["name"]: c for c in inspect(engine).get_columns("api_credentials")}
+    assert "capacities_token" in columns
+    assert columns["twos_user_id"]["nullable"]
+    assert columns["twos_token"]["nullable"]
+    engine.dispose()
@@ -0,0 +1,141 @@
+import pytest
+import responses
+from responses import matchers
+
+from readwise_twos_sync.readwise_client import ReadwiseClient
+
+BOOKS_URL = "https://readwise.io/api/v2/books/"
+EXPORT_URL = "https://readwise.io/api/v2/export/"
+SINCE = "2024-01-01T00:00:00"
+
+
+@pytest.fixture
+def readwise_api():
+    """responses mock that fails on any Readwise request not registered."""
+    with responses.RequestsMock() as rsps:
+        yield rsps
+
+
+def test_fetch_export_since_follows_cursor_and_fills_missing_metadata(readwise_api):
+    readwise_api.add(
+        responses.GET,
+        EXPORT_URL,
+        match=[matchers.query_param_matcher({"updatedAfter": SINCE})],
+        json={
+            "results": [
+                {
+                    "user_book_id": 1,
+                    "title": "Book",
+                    "author": None,
+                    "highlights": [{"id": 10, "text": "Quote", "book_id": 1}],
+                },
+                {
+                    "user_book_id": 2,
+                    "title": "How to use Readwise",
+                    "author": "Readwise",
+                    "highlights": [],
+                },
+            ],
+            "nextPageCursor": "cursor-2",
+        },
+    )
+    readwise_api.add(
+        responses.GET,
+        EXPORT_URL,
+        match=[matchers.query_param_matcher({"updatedAfter": SINCE, "pageCursor": "cursor-2"})],
+        json={
+            "results": [
+                {
+                    "user_book_id": 3,
+                    "title": None,
+                    "author": "Author",
+                    "highlights": [{"id": 11, "text": "Another", "book_id": 3}],
+                },
+            ],
+            "nextPageCursor": None,
+        },
+    )
+
+    highlights, books = ReadwiseClient(token="token").fetch_export_since(SINCE)
+
+    assert [h["id"] for h in highlights] == [10, 11]
+    assert books == {
+        1: {"title": "Book", "author": "Unknown"},
+        3: {"title": "Untitled", "author": "Author"},
+    }
+    assert len(readwise_api.calls) == 2
+
+
+def test_fetch_export_since_skips_deleted_highlights(readwise_api):
+    readwise_api.add(
+        responses.GET,
+        EXPORT_URL,
+        match=[matchers.query_param_matcher({"updatedAfter": SINCE})],
+        json={
+            "results": [
+                {
+                    "user_book_id": 1,
+                    "title": "Book",
+                    "author": "Author",
+                    "highlights": [
+                        {"id": 10, "text": "Kept", "book_id": 1, "is_deleted": False},
+                        {"id": 11, "text": "Removed", "book_id": 1, "is_deleted": True},
+                    ],
+                },
+            ],
+            "nextPageCursor": None,
+        },
+    )
+
+    highlights, books = ReadwiseClient(token="token").fetch_export_since(SINCE)
+
+    assert [h["id"] for h in highlights] == [10]
+    assert books == {1: {"title": "Book", "author": "Author"}}
+
+
+def test_fetch_all_books_fetches_remaining_pages_from_count(readwise_api):
+    page_size = str(ReadwiseClient.PAGE_SIZE)
+    count = ReadwiseClient.PAGE_SIZE * 2 + 1
+    for page, book_id in ((None, 1), ("2", 2), ("3", 3)):
+        params = {"page_size": page_size}
+        if page:
+            params["page"] = page
+        readwise_api.add(
+            responses.GET,
+            BOOKS_URL,
+            match=[matchers.query_param_matcher(params)],
+            json={
+                "count": count,
+                "next": f"{BOOKS_URL}?page=2" if page is None else None,
+                "results": [{"id": book_id, "title": f"Book {book_id}", "author": "Author"}],
+            },
+        )
+
+    books = ReadwiseClient(token="token").fetch_all_books()
+
+    # Pages are requested concurrently but yielded in page order
+    assert list(books) == [1, 2, 3]
+    assert len(readwise_api.calls) == 3
+
+
+def test_fetch_all_books_follows_next_links_without_count(readwise_api):
+    next_url = f"{BOOKS_URL}?page=2&page_size={ReadwiseClient.PAGE_SIZE}"
+    readwise_api.add(
+        responses.GET,
+        BOOKS_URL,
+        match=[matchers.query_param_matcher({"page_size": str(ReadwiseClient.PAGE_SIZE)})],
+        json={"next": next_url, "results": [{"id": 1, "title": "Book 1"}]},
+    )
+    readwise_api.add(
+        responses.GET,
+        BOOKS_URL,
+        match=[matchers.query_param_matcher({"page": "2", "page_size": str(ReadwiseClient.PAGE_SIZE)})],
+        json={"next": None, "results": [{"id": 2, "title": "Book 2", "author": "Author"}]},
+    )
+
+    books = ReadwiseClient(token="token").fetch_all_books()
+
+    assert books == {
+        1: {"title": "Book 1", "author": "Unknown"},
+        2: {"title": "Book 2", "author": "Author"},
+    }
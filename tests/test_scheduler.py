@@ -5,162 +5,86 @@ Test scheduler functionality
 import pytest
 import pytz
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from unittest.mock import patch, Mock
-from backend.app import User, ApiCredential, db, cipher_suite, schedule_sync_job
+from flask import has_app_context
+from backend.app import User, ApiCredential, db, schedule_sync_job
 
 
 class TestScheduler:
     """Test scheduled sync functionality."""
     
-    def test_schedule_sync_job_daily(self, app):
-        """Test scheduling a daily sync job."""
-        with app.app_context():
-            # Create test user
-            user = User(
-                name="Test User",
-                email="test@example.com",
-                password_hash="test_hash",
-                sync_enabled=True,
-                sync_time="09:00",
-                sync_frequency="daily"
-            )
-            db.session.add(user)
-            db.session.commit()
-            
-            # Mock scheduler
-            with patch('backend.app.scheduler') as mock_scheduler:
-                mock_scheduler.running = True
-                mock_scheduler.get_jobs.return_value = []
-                
-                # Schedule the job
-                schedule_sync_job(user.id)
-                
-                # Verify add_job was called with correct parameters
-                mock_scheduler.add_job.assert_called_once()
-                call_args = mock_scheduler.add_job.call_args
-                
-                assert call_args[1]['hour'] == 9
-                assert call_args[1]['minute'] == 0
-                assert 'timezone' in call_args[1]
-                assert call_args[1]['id'] == f'sync_user_{user.id}'
-    
-    def test_schedule_sync_job_weekly(self, app):
-        """Test scheduling a weekly sync job."""
-        with app.app_context():
-            # Create test user with weekly sync
-            user = User(
-                name="Test User",
-                email="test@example.com",
-                password_hash="test_hash",
-                sync_enabled=True,
-                sync_time="14:30",
-                sync_frequency="weekly"
-            )
-            db.session.add(user)
-            db.session.commit()
-            
-            # Mock scheduler
-            with patch('backend.app.scheduler') as mock_scheduler:
-                mock_scheduler.running = True
-                mock_scheduler.get_jobs.return_value = []
-                
-                # Schedule the job
-                schedule_sync_job(user.id)
-                
-                # Verify add_job was called with correct parameters
-                mock_scheduler.add_job.assert_called_once()
-                call_args = mock_scheduler.add_job.call_args
-                
-                assert call_args[1]['hour'] == 14
-                assert call_args[1]['minute'] == 30
-                assert call_args[1]['day_of_week'] == 'mon'
-                assert 'timezone' in call_args[1]
-    
-    def test_schedule_sync_job_disabled_user(self, app):
-        """Test that disabled users don't get scheduled."""
-        with app.app_context():
-            # Create disabled user
-            user = User(
-                name="Test User",
-                email="test@example.com",
-                password_hash="test_hash",
-                sync_enabled=False,
-                sync_time="09:00",
-                sync_frequency="daily"
-            )
-            db.session.add(user)
-            db.session.commit()
-            
-            # Mock scheduler
-            with patch('backend.app.scheduler') as mock_scheduler:
-                mock_scheduler.running = True
-                
-                # Try to schedule the job
-                schedule_sync_job(user.id)
-                
-                # Verify add_job was NOT called
-                mock_scheduler.add_job.assert_not_called()
-    
-    def test_timezone_handling(self, app):
-        """Test that timezone is properly handled in scheduling."""
-        with app.app_context():
-            user = User(
-                name="Test User",
-                email="test@example.com",
-                password_hash="test_hash",
-                sync_enabled=True,
-                sync_time="15:45",
-                sync_frequency="daily"
-            )
-            db.session.add(user)
-            db.session.commit()
-            
-            with patch('backend.app.scheduler') as mock_scheduler:
-                mock_scheduler.running = True
-                mock_scheduler.get_jobs.return_value = []
-                
-                schedule_sync_job(user.id)
-                
-                call_args = mock_scheduler.add_job.call_args
-                timezone = call_args[1]['timezone']
-                
-                # Should be America/Chicago timezone
-                assert isinstance(timezone, pytz.BaseTzInfo)
-                assert 'America/Chicago' in str(timezone)
+    @pytest.mark.parametrize("sync_time,frequency,enabled,expected", [
+        ("09:00", "daily", True, {"hour": 9, "minute": 0}),
+        ("14:30", "weekly", True, {"hour": 14, "minute": 30, "day_of_week": "mon"}),
+        ("09:00", "daily", False, None),
+        ("15:45", "daily", True, {"hour": 15, "minute": 45}),
+    ])
+    def test_schedule_sync_job(self, app, mock_scheduler, sync_time, frequency, enabled, expected):
+        """Test scheduling daily, weekly and disabled users' sync jobs."""
+        # schedule_sync_job only reads the user's sync settings, so serve a
+        # plain object from User.query instead of a database row
+        user = SimpleNamespace(
+            id=42,
+            sync_enabled=enabled,
+            sync_time=sync_time,
+            sync_frequency=frequency
+        )
+        
+        # Schedule the job
+        with patch.object(User, 'query') as mock_query:
+            mock_query.get.return_value = user
+            schedule_sync_job(user.id)
+        mock_query.get.assert_called_once_with(user.id)
+        
+        if expected is None:
+            # Disabled users don't get scheduled
+            mock_scheduler.add_job.assert_not_called()
+            return
+        
+        # Verify add_job was called with correct parameters
+        mock_scheduler.add_job.assert_called_once()
+        job_kwargs = mock_scheduler.add_job.call_args.kwargs
+        
+        for key, value in expected.items():
+            assert job_kwargs[key] == value
+        assert job_kwargs['id'] == f'sync_user_{user.id}'
+        
+        # Should be America/Chicago timezone
+        timezone = job_kwargs['timezone']
+        assert isinstance(timezone, pytz.BaseTzInfo)
+        assert 'America/Chicago' in str(timezone)
     
+    @pytest.mark.no_appctx
     @patch('backend.app.perform_sync')
-    def test_run_scheduled_sync(self, mock_perform_sync, app):
+    def test_run_scheduled_sync(self, mock_perform_sync, app, encrypted_tokens):
         """Test the scheduled sync execution."""
-        with app.app_context():
-            # Create user and credentials
-            user = User(
-                name="Test User",
-                email="test@example.com",
-                password_hash="test_hash",
-                sync_enabled=True,
-                sync_time="09:00",
-                sync_frequency="daily"
-            )
-            db.session.add(user)
-            db.session.commit()
+        # Create user and credentials
+        user = User(
+            name="Test User",
+            email="test@example.com",
+            password_hash="test_hash",
+            sync_enabled=True,
+            sync_time="09:00",
+            sync_frequency="daily"
+        )
+        db.session.add(user)
+        db.session.commit()
 
-            # Add credentials
-            encrypted_readwise = cipher_suite.encrypt('test_readwise_token'.encode())
-            encrypted_twos = cipher_suite.encrypt('test_twos_token'.encode())
-            encrypted_cap = cipher_suite.encrypt('cap_token'.encode())
+        # Add credentials
 
-            creds = ApiCredential(
-                user_id=user.id,
-                readwise_token=encrypted_readwise.decode(),
-                twos_user_id='test_twos_user',
-                twos_token=encrypted_twos.decode(),
-                capacities_space_id='space123',
-                capacities_token=encrypted_cap.decode()
-            )
-            db.session.add(creds)
-            db.session.commit()
+        creds = ApiCredential(
+            user_id=user.id,
+            readwise_token=encrypted_tokens['readwise'],
+            twos_user_id='test_twos_user',
+            twos_token=encrypted_tokens['twos'],
+            capacities_space_id='space123',
+            capacities_token=encrypted_tokens['cap']
+        )
+        db.session.add(creds)
+        db.session.commit()
 
-            user_id = user.id
+        user_id = user.id
 
         # Mock successful sync
         mock_perform_sync.return_value = {
@@ -173,15 +97,37 @@ class TestScheduler:
         from backend.app import run_scheduled_sync
 
         # Execute scheduled sync outside of an application context
+        assert not has_app_context()
         run_scheduled_sync(user_id)
 
         # Verify perform_sync was called with correct parameters
         mock_perform_sync.assert_called_once()
-        call_args = mock_perform_sync.call_args[1]
+        sync_kwargs = mock_perform_sync.call_args.kwargs
+
+        assert sync_kwargs['twos_user_id'] == 'test_twos_user'
+        assert sync_kwargs['capacities_space_id'] == 'space123'
+        assert sync_kwargs['capacities_token'] == 'cap_token'
+        assert sync_kwargs['days_back'] == 1
+        assert sync_kwargs['user_id'] == user_id
 
-        assert call_args['twos_user_id'] == 'test_twos_user'
-        assert call_args['capacities_space_id'] == 'space123'
-        assert call_args['capacities_token'] == 'cap_token'
-        assert call_args['days_back'] == 1
-        assert call_args['user_id'] == user_id
 
+    @pytest.mark.parametrize("sync_time,tz_name", [
+        ("09:00", "America/Chicago"),
+        ("00:00", "UTC"),
+        ("23:30", "Asia/Singapore"),
+    ])
+    def test_cron_job_timezone(self, background_scheduler, sync_time, tz_name):
+        """Test that a cron job's next run follows the timezone it was given."""
+        hour, minute = map(int, sync_time.split(':'))
+        job = background_scheduler.add_job(
+            lambda: None,
+            'cron',
+            hour=hour,
+            minute=minute,
+            timezone=pytz.timezone(tz_name),
+            id='sync_user_tz'
+        )
+        
+        next_run = job.next_run_time
+        assert next_run.tzinfo.zone == tz_name
+        assert (next_run.hour, next_run.minute) == (hour, minute)
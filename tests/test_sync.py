@@ -2,10 +2,74 @@
 Test sync functionality
 """
 
+import sys
+import types
+
 import pytest
-import json
-from unittest.mock import patch, Mock
-from backend.app import ApiCredential, SyncLog, db, cipher_suite
+from unittest.mock import patch
+from sqlalchemy import text
+from readwise_twos_sync import json_utils
+from backend.app import ApiCredential, SyncLog, db
+
+
+class _FakeCap:
+    """Stand-in for CapacitiesClient that records how it was built and called."""
+
+    __slots__ = ("kwargs", "calls")
+
+    last = None
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls = []
+        _FakeCap.last = self
+
+    def post_highlights(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+
+
+
+class _FakeJob:
+    """Stand-in for a Celery AsyncResult."""
+
+    __slots__ = ("id", "state", "result")
+
+    def __init__(self, job_id, state="PENDING", result=None):
+        self.id = job_id
+        self.state = state
+        self.result = result
+
+    def ready(self):
+        return self.state in ("SUCCESS", "FAILURE", "REVOKED")
+
+
+class _FakeSyncTask:
+    """Stand-in for backend.tasks.sync_user that records queued calls."""
+
+    def __init__(self):
+        self.queued = []
+        self.jobs = {}
+        self.error = None
+
+    def apply_async(self, args, **kwargs):
+        if self.error is not None:
+            raise self.error
+        self.queued.append(args)
+        return _FakeJob("job-1")
+
+    def AsyncResult(self, job_id):
+        return self.jobs.get(job_id, _FakeJob(job_id))
+
+
+@pytest.fixture
+def sync_queue(monkeypatch):
+    """Enable the queued sync path with an in-process backend.tasks."""
+    task = _FakeSyncTask()
+    tasks_module = types.ModuleType("backend.tasks")
+    tasks_module.sync_user = task
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setitem(sys.modules, "backend.tasks", tasks_module)
+    return task
 
 
 class TestSyncFunctionality:
@@ -15,124 +79,86 @@ class TestSyncFunctionality:
         """Test updating API credentials."""
         headers, user_id = auth_headers
         
-        with app.app_context():
-            response = client.post('/api/credentials',
-                headers=headers,
-                json={
-                    'readwise_token': 'test_readwise_token',
-                    'twos_user_id': 'test_twos_user',
-                    'twos_token': 'test_twos_token',
-                    'capacities_space_id': 'space123',
-                    'capacities_token': 'cap_token'
-                }
-            )
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['message'] == 'Credentials saved successfully'
-            
-            # Verify credentials were stored
-            creds = ApiCredential.query.filter_by(user_id=user_id).first()
-            assert creds is not None
-            assert creds.twos_user_id == 'test_twos_user'
-            assert creds.capacities_space_id == 'space123'
+        response = client.post('/api/credentials',
+            headers=headers,
+            json={
+                'readwise_token': 'test_readwise_token',
+                'twos_user_id': 'test_twos_user',
+                'twos_token': 'test_twos_token',
+                'capacities_space_id': 'space123',
+                'capacities_token': 'cap_token'
+            }
+        )
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['message'] == 'Credentials saved successfully'
+        
+        # Verify credentials were stored
+        creds = ApiCredential.query.filter_by(user_id=user_id).first()
+        assert creds is not None
+        assert creds.twos_user_id == 'test_twos_user'
+        assert creds.capacities_space_id == 'space123'
 
     def test_update_credentials_capacities_only(self, app, client, auth_headers):
         """Test updating credentials when only Capacities is enabled."""
         headers, user_id = auth_headers
 
-        with app.app_context():
-            response = client.post('/api/credentials',
-                headers=headers,
-                json={
-                    'readwise_token': 'rw_token',
-                    'twos_user_id': None,
-                    'twos_token': None,
-                    'capacities_space_id': 'space123',
-                    'capacities_token': 'cap_token'
-                }
-            )
-            assert response.status_code == 200
+        response = client.post('/api/credentials',
+            headers=headers,
+            json={
+                'readwise_token': 'rw_token',
+                'twos_user_id': None,
+                'twos_token': None,
+                'capacities_space_id': 'space123',
+                'capacities_token': 'cap_token'
+            }
+        )
+        assert response.status_code == 200
 
-            creds = ApiCredential.query.filter_by(user_id=user_id).first()
-            assert creds is not None
-            assert creds.twos_user_id is None
-            assert creds.capacities_space_id == 'space123'
+        creds = ApiCredential.query.filter_by(user_id=user_id).first()
+        assert creds is not None
+        assert creds.twos_user_id is None
+        assert creds.capacities_space_id == 'space123'
     
-    def test_get_credentials(self, app, client, auth_headers):
+    def test_get_credentials(self, app, client, auth_headers, seeded_credentials):
         """Test retrieving API credentials."""
         headers, user_id = auth_headers
         
-        with app.app_context():
-            # First, store some credentials
-            encrypted_readwise = cipher_suite.encrypt('test_readwise_token'.encode())
-            encrypted_twos = cipher_suite.encrypt('test_twos_token'.encode())
-            encrypted_cap = cipher_suite.encrypt('cap_token'.encode())
-
-            creds = ApiCredential(
-                user_id=user_id,
-                readwise_token=encrypted_readwise.decode(),
-                twos_user_id='test_twos_user',
-                twos_token=encrypted_twos.decode(),
-                capacities_space_id='space123',
-                capacities_token=encrypted_cap.decode()
-            )
-            db.session.add(creds)
-            db.session.commit()
-            
-            # Retrieve credentials
-            response = client.get('/api/credentials', headers=headers)
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['readwise_token'] == 'test_readwise_token'
-            assert data['twos_user_id'] == 'test_twos_user'
-            assert data['capacities_space_id'] == 'space123'
+        # Retrieve credentials
+        response = client.get('/api/credentials', headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['readwise_token'] == 'test_readwise_token'
+        assert data['twos_user_id'] == 'test_twos_user'
+        assert data['capacities_space_id'] == 'space123'
     
-    def test_manual_sync(self, app, client, auth_headers, mock_readwise_api, mock_post_requests):
+    def test_manual_sync(self, app, client, auth_headers, seeded_credentials, mock_readwise_api, mock_twos_api):
         """Test manual sync operation."""
         headers, user_id = auth_headers
 
-        with app.app_context():
-            # Store credentials
-            encrypted_readwise = cipher_suite.encrypt('test_readwise_token'.encode())
-            encrypted_twos = cipher_suite.encrypt('test_twos_token'.encode())
-            encrypted_cap = cipher_suite.encrypt('cap_token'.encode())
-
-            creds = ApiCredential(
-                user_id=user_id,
-                readwise_token=encrypted_readwise.decode(),
-                twos_user_id='test_twos_user',
-                twos_token=encrypted_twos.decode(),
-                capacities_space_id='space123',
-                capacities_token=encrypted_cap.decode()
+        with patch('backend.app.CapacitiesClient', _FakeCap):
+            # Perform sync
+            response = client.post(
+                '/api/sync', headers=headers, json={'days_back': 1}
             )
-            db.session.add(creds)
-            db.session.commit()
-
-            with patch('backend.app.CapacitiesClient') as MockCapClient:
-                mock_client = Mock()
-                MockCapClient.return_value = mock_client
-
-                # Perform sync
-                response = client.post(
-                    '/api/sync', headers=headers, json={'days_back': 1}
-                )
-                assert response.status_code == 200
-                data = json.loads(response.data)
-                assert data['success'] is True
-                assert 'highlights_synced' in data
-
-                # Verify sync log was created
-                sync_log = SyncLog.query.filter_by(user_id=user_id).first()
-                assert sync_log is not None
-                assert sync_log.status == 'success'
-
-                # Ensure posts were made to Twos (2 highlights)
-                twos_calls = [c for c in mock_post_requests.call_args_list if 'twosapp' in c.args[0]]
-                assert len(twos_calls) == 2
-
-                # Verify Capacities client usage
-                MockCapClient.assert_called_once_with(token='cap_token', space_id='space123')
-                mock_client.post_highlights.assert_called_once()
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['success'] is True
+            assert 'highlights_synced' in data
+
+            # Verify sync log was created
+            sync_log = SyncLog.query.filter_by(user_id=user_id).first()
+            assert sync_log is not None
+            assert sync_log.status == 'success'
+
+            # Ensure both highlights were posted to Twos in one batch
+            twos_calls = [r for r in mock_twos_api.requests if 'twosapp' in r.url]
+            assert len(twos_calls) == 1
+            assert len(json_utils.loads(twos_calls[0].body)['text'].split('\n')) == 2
+
+            # Verify Capacities client usage
+            assert _FakeCap.last.kwargs == {'token': 'cap_token', 'space_id': 'space123'}
+            assert len(_FakeCap.last.calls) == 1
     
     def test_sync_without_credentials(self, client, auth_headers):
         """Test sync without stored credentials."""
@@ -143,52 +169,140 @@ class TestSyncFunctionality:
             json={'days_back': 1}
         )
         assert response.status_code == 404
-        data = json.loads(response.data)
+        data = response.get_json()
         assert 'No API credentials found' in data['error']
     
     def test_update_sync_settings(self, app, client, auth_headers):
         """Test updating sync settings."""
         headers, user_id = auth_headers
         
-        with app.app_context():
-            response = client.post('/api/sync/settings',
-                headers=headers,
-                json={
-                    'sync_enabled': False,
-                    'sync_time': '10:30',
-                    'sync_frequency': 'weekly'
-                }
-            )
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert data['settings']['sync_enabled'] is False
-            assert data['settings']['sync_time'] == '10:30'
-            assert data['settings']['sync_frequency'] == 'weekly'
+        response = client.post('/api/sync/settings',
+            headers=headers,
+            json={
+                'sync_enabled': False,
+                'sync_time': '10:30',
+                'sync_frequency': 'weekly'
+            }
+        )
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['settings']['sync_enabled'] is False
+        assert data['settings']['sync_time'] == '10:30'
+        assert data['settings']['sync_frequency'] == 'weekly'
     
     def test_sync_history(self, app, client, auth_headers):
         """Test retrieving sync history."""
         headers, user_id = auth_headers
         
-        with app.app_context():
-            # Create some sync logs
-            log1 = SyncLog(
-                user_id=user_id,
-                status='success',
-                highlights_synced=5,
-                details='Test sync 1'
-            )
-            log2 = SyncLog(
-                user_id=user_id,
-                status='failed',
-                highlights_synced=0,
-                details='Test sync 2 failed'
-            )
-            db.session.add_all([log1, log2])
-            db.session.commit()
-            
-            response = client.get('/api/sync/history', headers=headers)
-            assert response.status_code == 200
-            data = json.loads(response.data)
-            assert len(data['history']) == 2
-            assert data['history'][0]['status'] in ['success', 'failed']
+        # Create some sync logs with one Core executemany insert
+        rows = [
+            {'user_id': user_id, 'status': 'success', 'highlights_synced': 5, 'details': 'Test sync 1'},
+            {'user_id': user_id, 'status': 'failed', 'highlights_synced': 0, 'details': 'Test sync 2 failed'}
+        ]
+        db.session.execute(SyncLog.__table__.insert(), rows)
+        db.session.commit()
+        
+        response = client.get('/api/sync/history', headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data['history']) == 2
+        assert data['history'][0]['status'] in ['success', 'failed']
+    
+    def test_sync_history_query_uses_index(self, app, auth_headers):
+        """Test that the history query seeks ix_sync_logs_user_created."""
+        _, user_id = auth_headers
+        
+        # Same filter and ordering as GET /api/sync/history
+        plan = db.session.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT * FROM sync_logs "
+                "WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 10"
+            ),
+            {'user_id': user_id}
+        ).fetchall()
+        details = [row[-1] for row in plan]
+        assert any('USING INDEX ix_sync_logs_user_created' in detail for detail in details)
+        assert not any('TEMP B-TREE' in detail for detail in details)
+
 
+class TestQueuedSync:
+    """Test the Celery-backed sync and status endpoints."""
+    
+    def test_sync_is_queued(self, app, client, auth_headers, seeded_credentials, sync_queue):
+        """Test that a sync is queued when a broker is configured."""
+        headers, user_id = auth_headers
+        
+        response = client.post('/api/sync', headers=headers, json={'days_back': 3})
+        assert response.status_code == 202
+        assert response.get_json() == {'job_id': 'job-1', 'status': 'queued'}
+        assert sync_queue.queued == [(user_id, 3)]
+    
+    def test_sync_runs_inline_when_broker_unreachable(self, app, client, auth_headers, seeded_credentials,
+                                                      sync_queue, mock_readwise_api, mock_twos_api):
+        """Test that an unreachable broker falls back to the inline sync."""
+        headers, user_id = auth_headers
+        sync_queue.error = ConnectionRefusedError("broker down")
+        
+        with patch('backend.app.CapacitiesClient', _FakeCap):
+            response = client.post('/api/sync', headers=headers, json={'days_back': 1})
+        
+        assert response.status_code == 200
+        assert response.get_json()['success'] is True
+        assert sync_queue.queued == []
+    
+    def test_status_pending(self, app, client, auth_headers, sync_queue):
+        """Test the status of a job the worker hasn't finished."""
+        headers, _ = auth_headers
+        sync_queue.jobs['job-1'] = _FakeJob('job-1', state='STARTED')
+        
+        response = client.get('/api/sync/status/job-1', headers=headers)
+        assert response.status_code == 200
+        assert response.get_json() == {'job_id': 'job-1', 'status': 'started'}
+    
+    def test_status_finished(self, app, client, auth_headers, sync_queue):
+        """Test the status of a job that synced successfully."""
+        headers, user_id = auth_headers
+        result = {'success': True, 'highlights_synced': 2, 'user_id': user_id}
+        sync_queue.jobs['job-1'] = _FakeJob('job-1', state='SUCCESS', result=result)
+        
+        response = client.get('/api/sync/status/job-1', headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['status'] == 'finished'
+        assert data['result']['highlights_synced'] == 2
+    
+    def test_status_unsuccessful_sync(self, app, client, auth_headers, sync_queue):
+        """Test that a sync the task reported as failed maps to an error."""
+        headers, user_id = auth_headers
+        result = {'success': False, 'error': 'Sync failed: boom', 'user_id': user_id}
+        sync_queue.jobs['job-1'] = _FakeJob('job-1', state='SUCCESS', result=result)
+        
+        response = client.get('/api/sync/status/job-1', headers=headers)
+        assert response.status_code == 200
+        assert response.get_json() == {'job_id': 'job-1', 'status': 'failed', 'error': 'Sync failed: boom'}
+    
+    def test_status_task_failure(self, app, client, auth_headers, sync_queue):
+        """Test that a task which raised reports a failure, not a missing job."""
+        headers, _ = auth_headers
+        sync_queue.jobs['job-1'] = _FakeJob('job-1', state='FAILURE', result=RuntimeError('boom'))
+        
+        response = client.get('/api/sync/status/job-1', headers=headers)
+        assert response.status_code == 200
+        assert response.get_json() == {'job_id': 'job-1', 'status': 'failed', 'error': 'Sync failed'}
+    
+    def test_status_of_another_users_job(self, app, client, auth_headers, sync_queue):
+        """Test that a finished job owned by someone else is not found."""
+        headers, user_id = auth_headers
+        result = {'success': True, 'highlights_synced': 2, 'user_id': user_id + 1}
+        sync_queue.jobs['job-1'] = _FakeJob('job-1', state='SUCCESS', result=result)
+        
+        response = client.get('/api/sync/status/job-1', headers=headers)
+        assert response.status_code == 404
+    
+    def test_status_without_queue(self, app, client, auth_headers, monkeypatch):
+        """Test the status endpoint when no broker is configured."""
+        headers, _ = auth_headers
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        
+        response = client.get('/api/sync/status/job-1', headers=headers)
+        assert response.status_code == 404
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from readwise_twos_sync import json_utils, sync_manager
+from readwise_twos_sync.config import Config
+from readwise_twos_sync.sync_manager import SyncManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """SyncManager for Twos and Capacities with its sync file under tmp_path."""
+    monkeypatch.setenv("READWISE_TOKEN", "rw")
+    monkeypatch.setenv("TWOS_USER_ID", "user")
+    monkeypatch.setenv("TWOS_TOKEN", "twos")
+    monkeypatch.setenv("CAPACITIES_TOKEN", "cap")
+    monkeypatch.setenv("CAPACITIES_SPACE_ID", "space")
+    monkeypatch.setenv("LAST_SYNC_FILE", str(tmp_path / "last_sync.json"))
+    return SyncManager(Config(env_file=str(tmp_path / "missing.env")))
+
+
+class _BarrierClient:
+    """Destination that blocks until every destination is posting at once."""
+
+    def __init__(self, barrier):
+        self.barrier = barrier
+        self.calls = []
+
+    def post_highlights(self, highlights, books):
+        self.barrier.wait()
+        self.calls.append((highlights, books))
+
+
+def test_save_last_sync_time_replaces_file(manager, tmp_path):
+    manager._save_last_sync_time("2024-01-01T00:00:00+00:00")
+
+    sync_file = manager.config.last_sync_file
+    assert json_utils.loads(sync_file.read_bytes()) == {"last_sync": "2024-01-01T00:00:00+00:00"}
+    assert list(tmp_path.iterdir()) == [sync_file]
+
+
+def test_failed_save_keeps_previous_sync_file(manager, tmp_path, monkeypatch):
+    manager._save_last_sync_time("2024-01-01T00:00:00+00:00")
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(sync_manager.os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        manager._save_last_sync_time("2024-02-01T00:00:00+00:00")
+
+    sync_file = manager.config.last_sync_file
+    assert json_utils.loads(sync_file.read_bytes()) == {"last_sync": "2024-01-01T00:00:00+00:00"}
+    assert list(tmp_path.iterdir()) == [sync_file]
+    assert manager._get_last_sync_time() == "2024-01-01T00:00:00+00:00"
+
+
+def test_last_sync_time_is_read_once(manager):
+    sync_file = manager.config.last_sync_file
+    sync_file.write_bytes(json_utils.dumps({"last_sync": "2024-01-01T00:00:00+00:00"}))
+
+    assert manager._get_last_sync_time() == "2024-01-01T00:00:00+00:00"
+    sync_file.unlink()
+    assert manager._get_last_sync_time() == "2024-01-01T00:00:00+00:00"
+
+
+def test_post_to_destinations_runs_clients_concurrently(manager):
+    # Posting one destination after the other would never release the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    manager.twos_client = _BarrierClient(barrier)
+    manager.capacities_client = _BarrierClient(barrier)
+    highlights = [{"book_id": 1, "text": "Quote"}]
+    books = {1: {"title": "Book", "author": "Author"}}
+
+    manager._post_to_destinations(highlights, books)
+
+    assert manager.twos_client.calls == [(highlights, books)]
+    assert manager.capacities_client.calls == [(highlights, books)]
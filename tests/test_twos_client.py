@@ -0,0 +1,44 @@
+import json
+
+import pytest
+import responses
+
+from readwise_twos_sync.twos_client import TwosClient
+
+TWOS_URL = "https://www.twosapp.com/apiV2/user/addToToday"
+
+
+@pytest.fixture
+def twos_api():
+    """responses mock with the Twos add-to-today endpoint registered."""
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.POST, TWOS_URL, json={}, status=200)
+        yield rsps
+
+
+def test_post_highlights_sends_batches_in_order(twos_api):
+    client = TwosClient(user_id="user", token="token")
+
+    count = TwosClient.BATCH_SIZE * 4
+    highlights = [{"book_id": 1, "text": f"Quote {i}"} for i in range(count)]
+    books = {1: {"title": "Book", "author": "Author"}}
+
+    client.post_highlights(highlights, books, today_title="Mon Jan 01, 2024")
+
+    assert len(twos_api.calls) == 4
+    sent = [
+        line
+        for call in twos_api.calls
+        for line in json.loads(call.request.body)["text"].split("\n")
+    ]
+    assert sent == [f"Book, Author: Quote {i}" for i in range(count)]
+
+
+def test_session_only_retries_posts_twos_cannot_have_stored():
+    client = TwosClient(user_id="user", token="token")
+
+    retries = client.session.get_adapter(TWOS_URL).max_retries
+    assert retries.read == 0
+    assert retries.other == 0
+    assert retries.status_forcelist == [429]
+    assert retries.respect_retry_after_header
@@ -32,27 +32,17 @@ class TestUtilities:
         
         assert encrypted1 != encrypted2
     
-    def test_sync_time_parsing(self):
-        """Test sync time string parsing."""
-        sync_time = "14:30"
+    @pytest.mark.parametrize("sync_time,expected_hour,expected_minute", [
+        ("14:30", 14, 30),
+        ("00:00", 0, 0),  # midnight
+        ("23:59", 23, 59),  # late evening
+    ])
+    def test_sync_time_parsing(self, sync_time, expected_hour, expected_minute):
+        """Test sync time string parsing, including edge cases."""
         hour, minute = map(int, sync_time.split(':'))
         
-        assert hour == 14
-        assert minute == 30
-    
-    def test_sync_time_edge_cases(self):
-        """Test edge cases for sync time parsing."""
-        # Test midnight
-        sync_time = "00:00"
-        hour, minute = map(int, sync_time.split(':'))
-        assert hour == 0
-        assert minute == 0
-        
-        # Test late evening
-        sync_time = "23:59"
-        hour, minute = map(int, sync_time.split(':'))
-        assert hour == 23
-        assert minute == 59
+        assert hour == expected_hour
+        assert minute == expected_minute
     
     def test_days_back_calculation(self):
         """Test days back calculation for sync."""
@@ -103,4 +93,19 @@ class TestUtilities:
         # Test missing book
         highlight_missing = {"book_id": 999, "text": "Missing book"}
         book_meta_missing = books.get(highlight_missing["book_id"])
-        assert book_meta_missing is None
\ No newline at end of file
+        assert book_meta_missing is None
+    
+    def test_token_cipher_round_trip(self):
+        """Test that stored tokens use AES-GCM and decrypt back."""
+        from backend.app import encrypt_token, decrypt_token
+        
+        stored = encrypt_token("test_api_token_12345")
+        assert stored.startswith("v2:")
+        assert decrypt_token(stored) == "test_api_token_12345"
+    
+    def test_token_cipher_reads_legacy_fernet(self):
+        """Test that tokens stored with Fernet still decrypt."""
+        from backend.app import decrypt_token
+        
+        legacy = cipher_suite.encrypt("legacy_token".encode()).decode()
+        assert decrypt_token(legacy) == "legacy_token"